@@ -0,0 +1,5 @@
+import time
+
+# Taken when the package is first imported, before FastAPI or any app module,
+# so main.py can report the import-time share of startup
+IMPORT_STARTED = time.perf_counter()
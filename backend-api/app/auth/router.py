@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+from typing import Literal
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
+from pydantic import ValidationError
 
 from app.auth.schemas import (
+    MAX_BULK_CSV_BYTES,
+    MAX_BULK_INVITES,
+    BulkInviteEntry,
+    BulkInviteItem,
+    BulkInviteRequest,
+    BulkInviteResponse,
     InviteClinicianRequest,
     InvitePatientRequest,
     InviteResponse,
 )
 from app.auth.service import AuthService
+from app.middleware.auth import ADMIN_ROLE
 
 router = APIRouter()
 
@@ -14,13 +26,27 @@ def get_auth_service() -> AuthService:
     return AuthService()
 
 
+def _ensure_admin(request: Request) -> None:
+    """Bulk onboarding creates auth users at scale: admin JWT only."""
+    if not getattr(request.state, "user_id", None):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+    if getattr(request.state, "role", None) != ADMIN_ROLE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+
 @router.post("/admin/invite-clinician", response_model=InviteResponse)
 async def invite_clinician(
     payload: InviteClinicianRequest,
     service: AuthService = Depends(get_auth_service),
 ) -> InviteResponse:
     try:
-        return service.invite_clinician(payload)
+        return await service.invite_clinician(payload)
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -34,9 +60,97 @@ async def invite_patient(
     service: AuthService = Depends(get_auth_service),
 ) -> InviteResponse:
     try:
-        return service.invite_patient(payload)
+        return await service.invite_patient(payload)
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to invite patient: {exc}",
         )
+
+
+async def _bulk_invite(
+    service: AuthService,
+    role: str,
+    entries: list[tuple[int, BulkInviteEntry]],
+    rejected: list[BulkInviteItem],
+) -> BulkInviteResponse:
+    results = await service.invite_bulk(role, entries) if entries else []
+    results = sorted(results + rejected, key=lambda item: item.index)
+    return BulkInviteResponse(
+        role=role,
+        created=sum(item.status in ("created", "resumed") for item in results),
+        failed=sum(item.status == "failed" for item in results),
+        results=results,
+    )
+
+
+@router.post(
+    "/admin/invite/bulk",
+    response_model=BulkInviteResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(_ensure_admin)],
+)
+async def invite_bulk(
+    payload: BulkInviteRequest,
+    service: AuthService = Depends(get_auth_service),
+) -> BulkInviteResponse:
+    """
+    Onboard a list of clinicians or patients. Results are per row, in input
+    order; resubmit failed rows (with the returned user_id) to resume.
+    """
+    return await _bulk_invite(service, payload.role, list(enumerate(payload.entries)), [])
+
+
+@router.post(
+    "/admin/invite/bulk/csv",
+    response_model=BulkInviteResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(_ensure_admin)],
+)
+async def invite_bulk_csv(
+    role: Literal["clinician", "patient"] = Form(...),
+    file: UploadFile = File(..., description="CSV with an email column; optional full_name, specialty, phone, user_id"),
+    service: AuthService = Depends(get_auth_service),
+) -> BulkInviteResponse:
+    """Same as /admin/invite/bulk, from a CSV upload (row index = data row, from 0)."""
+    # Read at most one byte past the cap instead of buffering whatever was sent
+    if file.size is not None and file.size > MAX_BULK_CSV_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"CSV must be at most {MAX_BULK_CSV_BYTES // 2**20} MiB",
+        )
+    content = await file.read(MAX_BULK_CSV_BYTES + 1)
+    if len(content) > MAX_BULK_CSV_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"CSV must be at most {MAX_BULK_CSV_BYTES // 2**20} MiB",
+        )
+
+    try:
+        reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+        rows = list(reader)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unreadable CSV: {exc}")
+    if not reader.fieldnames or "email" not in reader.fieldnames:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV needs an 'email' column")
+    if not rows or len(rows) > MAX_BULK_INVITES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV must have between 1 and {MAX_BULK_INVITES} rows",
+        )
+
+    entries: list[tuple[int, BulkInviteEntry]] = []
+    rejected: list[BulkInviteItem] = []
+    for index, row in enumerate(rows):
+        # Empty cells mean "not set"
+        values = {key: value.strip() for key, value in row.items() if key and value and value.strip()}
+        try:
+            entries.append((index, BulkInviteEntry(**values)))
+        except ValidationError as exc:
+            rejected.append(BulkInviteItem(
+                index=index,
+                email=values.get("email", ""),
+                status="failed",
+                error="; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()),
+            ))
+    return await _bulk_invite(service, role, entries, rejected)
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from typing import Literal
+
+from pydantic import BaseModel, EmailStr, Field
 
 
 class InviteClinicianRequest(BaseModel):
@@ -17,3 +19,41 @@ class InviteResponse(BaseModel):
     user_id: str
     email: EmailStr
     role: str
+
+
+# Upper bound for one bulk invite (JSON or CSV)
+MAX_BULK_INVITES = 5000
+# Upper bound for a bulk invite CSV upload (5000 rows fit comfortably)
+MAX_BULK_CSV_BYTES = 2 * 2**20
+
+
+class BulkInviteEntry(BaseModel):
+    email: EmailStr
+    full_name: str | None = None  # required for clinicians
+    specialty: str | None = None
+    phone: str | None = None
+    # Resume: the auth user an earlier attempt already created for this row
+    # (returned in its BulkInviteItem); the user is not created again
+    user_id: str | None = None
+
+
+class BulkInviteRequest(BaseModel):
+    role: Literal["clinician", "patient"]
+    entries: list[BulkInviteEntry] = Field(..., min_length=1, max_length=MAX_BULK_INVITES)
+
+
+class BulkInviteItem(BaseModel):
+    index: int
+    email: str
+    # created | resumed (finished an earlier attempt's user) | exists
+    # (already fully onboarded) | failed (resubmit with user_id when set)
+    status: Literal["created", "resumed", "exists", "failed"]
+    user_id: str | None = None
+    error: str | None = None
+
+
+class BulkInviteResponse(BaseModel):
+    role: str
+    created: int
+    failed: int
+    results: list[BulkInviteItem]
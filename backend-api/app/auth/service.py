@@ -1,19 +1,29 @@
+import asyncio
 from typing import Literal
 
-from supabase import Client
-from app.config import get_supabase_admin_client
-from app.auth.schemas import InviteClinicianRequest, InvitePatientRequest, InviteResponse
+from supabase import AsyncClient
+from app.config import settings
+from app.services.supabase_client import get_async_admin_client
+from app.auth.schemas import (
+    BulkInviteEntry,
+    BulkInviteItem,
+    InviteClinicianRequest,
+    InvitePatientRequest,
+    InviteResponse,
+)
+from app.services.identity import invalidate_patient_id
+from app.utils.metrics import supabase_call
 
 
 RoleType = Literal["clinician", "patient"]
 
 
 class AuthService:
-    def __init__(self, admin_client: Client | None = None) -> None:
+    def __init__(self, admin_client: AsyncClient | None = None) -> None:
         # Use service-role client; bypasses RLS for admin operations
-        self.admin: Client = admin_client or get_supabase_admin_client()
+        self.admin: AsyncClient = admin_client or get_async_admin_client()
 
-    def _create_user_with_role(self, email: str, role: RoleType) -> str:
+    async def _create_user_with_role(self, email: str, role: RoleType) -> str:
         """
         Create a Supabase auth user with app_metadata.role set.
         Returns the auth user id as string.
@@ -24,15 +34,16 @@ class AuthService:
 
         # Supabase Python client: auth.admin.create_user(...)
         # Adjust to actual client version if needed.
-        resp = self.admin.auth.admin.create_user(
-            {
-                "email": email,
-                "password": temp_password,
-                "email_confirm": False,
-                "user_metadata": {},
-                "app_metadata": {"role": role},
-            }
-        )
+        with supabase_call("auth.users", "create_user"):
+            resp = await self.admin.auth.admin.create_user(
+                {
+                    "email": email,
+                    "password": temp_password,
+                    "email_confirm": False,
+                    "user_metadata": {},
+                    "app_metadata": {"role": role},
+                }
+            )
 
         
         if not resp.user:
@@ -40,43 +51,45 @@ class AuthService:
 
         return str(resp.user.id)
 
-    def invite_clinician(self, payload: InviteClinicianRequest) -> InviteResponse:
+    async def invite_clinician(self, payload: InviteClinicianRequest) -> InviteResponse:
         """
         1) Create auth user with role=clinician
         2) Insert into clinicians table
         """
-        user_id = self._create_user_with_role(payload.email, "clinician")
+        user_id = await self._create_user_with_role(payload.email, "clinician")
 
         # Insert clinician profile
-        self.admin.table("clinicians").insert(
-            {
-                "clinician_id": user_id,
-                "email": payload.email,
-                "full_name": payload.full_name,
-                "specialty": payload.specialty,
-                "is_active": True,
-            }
-        ).execute()
+        with supabase_call("clinicians", "insert"):
+            await self.admin.table("clinicians").insert(
+                {
+                    "clinician_id": user_id,
+                    "email": payload.email,
+                    "full_name": payload.full_name,
+                    "specialty": payload.specialty,
+                    "is_active": True,
+                }
+            ).execute()
 
         return InviteResponse(user_id=user_id, email=payload.email, role="clinician")
 
-    def invite_patient(self, payload: InvitePatientRequest) -> InviteResponse:
+    async def invite_patient(self, payload: InvitePatientRequest) -> InviteResponse:
         """
         1) Create auth user with role=patient
         2) Create patients row
         3) Create patient_accounts row linking auth user to patient_id
         """
-        user_id = self._create_user_with_role(payload.email, "patient")
+        user_id = await self._create_user_with_role(payload.email, "patient")
 
         # Create patient record
-        patients_res = self.admin.table("patients").insert(
-            {
-                # patient_id will be generated by DB default if you set it that way;
-                # otherwise supply uuid here.
-                "assigned_model_id": None,
-                "primary_clinician_id": None,
-            }
-        ).execute()
+        with supabase_call("patients", "insert"):
+            patients_res = await self.admin.table("patients").insert(
+                {
+                    # patient_id will be generated by DB default if you set it that way;
+                    # otherwise supply uuid here.
+                    "assigned_model_id": None,
+                    "primary_clinician_id": None,
+                }
+            ).execute()
 
         if not patients_res.data:
             raise RuntimeError("Failed to create patient record")
@@ -84,13 +97,162 @@ class AuthService:
         patient_id = patient_row["patient_id"]
 
         # Link auth user to patient id
-        self.admin.table("patient_accounts").insert(
-            {
-                "user_id": user_id,
-                "patient_id": patient_id,
-            }
-        ).execute()
+        with supabase_call("patient_accounts", "insert"):
+            await self.admin.table("patient_accounts").insert(
+                {
+                    "user_id": user_id,
+                    "patient_id": patient_id,
+                }
+            ).execute()
+        # The user now resolves to this patient; drop anything cached for the id
+        invalidate_patient_id(user_id)
 
         # Optional: if you later add identity fields to patients, update here
 
         return InviteResponse(user_id=user_id, email=payload.email, role="patient")
+
+    async def invite_bulk(self, role: RoleType, entries: list[tuple[int, BulkInviteEntry]]) -> list[BulkInviteItem]:
+        """
+        Onboard many (index, entry) pairs:
+        1) Create the auth users, at most settings.invite_concurrency at a time
+        2) Batch-insert the clinicians rows, or the patients rows and then the
+           patient_accounts rows (one insert per table)
+
+        Failures are reported per row. A row that failed after its auth user
+        was created carries that user_id; resubmitting it with user_id set
+        finishes the onboarding without creating a second user, and rows
+        already onboarded come back as "exists". A resubmitted user_id must
+        be the auth user created for that email and role.
+        """
+        items: dict[int, BulkInviteItem] = {}
+        pending: list[tuple[BulkInviteItem, BulkInviteEntry]] = []
+        seen: set[str] = set()
+        for index, entry in entries:
+            item = items[index] = BulkInviteItem(index=index, email=entry.email, status="created", user_id=entry.user_id)
+            email = entry.email.lower()
+            if email in seen:
+                item.status, item.error = "failed", "Duplicate email in this request"
+            elif role == "clinician" and not entry.full_name:
+                item.status, item.error = "failed", "full_name is required for clinicians"
+            else:
+                seen.add(email)
+                pending.append((item, entry))
+
+        limit = asyncio.Semaphore(settings.invite_concurrency)
+
+        async def verify_user(item: BulkInviteItem, entry: BulkInviteEntry) -> None:
+            async with limit:
+                if not await self._user_matches(item.user_id, entry.email, role):
+                    item.status, item.error = "failed", f"user_id is not the {role} invited with this email"
+                    item.user_id = None
+
+        # Resumed rows: the route is public, so never link a user_id on trust
+        await asyncio.gather(*(verify_user(item, entry) for item, entry in pending if item.user_id))
+        pending = [(item, entry) for item, entry in pending if item.status != "failed"]
+
+        # Skip the ones an earlier attempt fully onboarded
+        resumed = [item.user_id for item, _ in pending if item.user_id]
+        if resumed:
+            done = await self._onboarded_user_ids(role, resumed)
+            for item, _ in pending:
+                if item.user_id in done:
+                    item.status = "exists"
+                elif item.user_id:
+                    item.status = "resumed"
+            pending = [(item, entry) for item, entry in pending if item.status != "exists"]
+
+        async def create_user(item: BulkInviteItem, entry: BulkInviteEntry) -> None:
+            async with limit:
+                try:
+                    item.user_id = await self._create_user_with_role(entry.email, role)
+                except Exception as exc:
+                    item.status, item.error = "failed", f"Failed to create auth user: {exc}"
+
+        await asyncio.gather(*(create_user(item, entry) for item, entry in pending if not item.user_id))
+        pending = [(item, entry) for item, entry in pending if item.status != "failed"]
+
+        if pending:
+            insert = self._insert_clinicians if role == "clinician" else self._insert_patients
+            try:
+                await insert(pending)
+            except Exception as exc:
+                # The batch is all or nothing: retry row by row so only bad rows fail
+                print(f"⚠️ Batched {role} insert failed ({exc}); retrying row by row.")
+
+                async def insert_one(item: BulkInviteItem, entry: BulkInviteEntry) -> None:
+                    async with limit:
+                        try:
+                            await insert([(item, entry)])
+                        except Exception as exc:
+                            item.status, item.error = "failed", f"Failed to create {role} records: {exc}"
+
+                await asyncio.gather(*(insert_one(item, entry) for item, entry in pending))
+
+        return [items[index] for index in sorted(items)]
+
+    async def _user_matches(self, user_id: str, email: str, role: RoleType) -> bool:
+        """Whether user_id is an auth user with this email and app_metadata.role."""
+        try:
+            with supabase_call("auth.users", "get_user"):
+                resp = await self.admin.auth.admin.get_user_by_id(user_id)
+        except Exception:
+            # Malformed or unknown id
+            return False
+        user = resp.user if resp else None
+        return (
+            user is not None
+            and (user.email or "").lower() == email.lower()
+            and (user.app_metadata or {}).get("role") == role
+        )
+
+    async def _onboarded_user_ids(self, role: RoleType, user_ids: list[str]) -> set[str]:
+        """The given auth users that already have their clinicians / patient_accounts row."""
+        table, column = ("clinicians", "clinician_id") if role == "clinician" else ("patient_accounts", "user_id")
+        with supabase_call(table, "select"):
+            resp = await self.admin.table(table).select(column).in_(column, user_ids).execute()
+        return {str(row[column]) for row in resp.data or []}
+
+    async def _insert_clinicians(self, pending: list[tuple[BulkInviteItem, BulkInviteEntry]]) -> None:
+        with supabase_call("clinicians", "insert"):
+            await self.admin.table("clinicians").insert([
+                {
+                    "clinician_id": item.user_id,
+                    "email": entry.email,
+                    "full_name": entry.full_name,
+                    "specialty": entry.specialty,
+                    "is_active": True,
+                }
+                for item, entry in pending
+            ]).execute()
+
+    async def _insert_patients(self, pending: list[tuple[BulkInviteItem, BulkInviteEntry]]) -> None:
+        """
+        patients rows, then the patient_accounts rows linking them. When the
+        link fails the new patients rows are deleted again, so a resumed run
+        never leaves an earlier attempt's patients orphaned.
+        """
+        with supabase_call("patients", "insert"):
+            patients_res = await self.admin.table("patients").insert(
+                [{"assigned_model_id": None, "primary_clinician_id": None} for _ in pending]
+            ).execute()
+        rows = patients_res.data or []
+
+        try:
+            if len(rows) != len(pending):
+                raise RuntimeError("Failed to create patient records")
+            # Rows come back in insert order
+            with supabase_call("patient_accounts", "insert"):
+                await self.admin.table("patient_accounts").insert([
+                    {"user_id": item.user_id, "patient_id": row["patient_id"]}
+                    for (item, _), row in zip(pending, rows)
+                ]).execute()
+        except Exception:
+            if rows:
+                with supabase_call("patients", "delete"):
+                    await self.admin.table("patients").delete().in_(
+                        "patient_id", [row["patient_id"] for row in rows]
+                    ).execute()
+            raise
+
+        for item, _ in pending:
+            invalidate_patient_id(item.user_id)
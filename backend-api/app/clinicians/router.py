@@ -40,7 +40,7 @@ async def get_my_profile(
 ) -> ClinicianProfile:
     clinician_id = _ensure_clinician(request)
     try:
-        return service.get_clinician_profile(clinician_id)
+        return await service.get_clinician_profile(clinician_id)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,4 +54,10 @@ async def get_my_dashboard(
     service: ClinicianService = Depends(get_clinician_service),
 ) -> ClinicianDashboard:
     clinician_id = _ensure_clinician(request)
-    return service.get_dashboard(clinician_id)
+    try:
+        return await service.get_dashboard(clinician_id)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        )
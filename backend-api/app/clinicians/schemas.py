@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+import datetime as dt
 
 
 class ClinicianProfile(BaseModel):
@@ -13,7 +14,11 @@ class ClinicianProfile(BaseModel):
 class PatientSummary(BaseModel):
     patient_id: str
     has_logs: bool | None = None
-    # extend later with more fields if needed
+    assigned_model_id: Optional[str] = None
+    # Current risk from the last 7 days of logs (None without recent logs)
+    last_log_date: Optional[dt.date] = None
+    risk_percentage: Optional[float] = None
+    status: Optional[str] = None
 
 
 class ClinicianDashboard(BaseModel):
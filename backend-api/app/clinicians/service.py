@@ -1,50 +1,134 @@
+import asyncio
 from typing import List
 
-from supabase import Client
+from supabase import AsyncClient
 
-from app.config import get_supabase_admin_client
+from app.services.supabase_client import get_async_admin_client
 from app.clinicians.schemas import (
     ClinicianProfile,
     PatientSummary,
     ClinicianDashboard,
 )
+from app.config import settings
+from app.services.log_features import LOG_FEATURES, cohort_features, window_start
+from app.services.ml_service import predictor
+from app.utils.cache import TTLCache
+from app.utils.metrics import supabase_call
+
+CLINICIAN_PROFILE_COLUMNS = "clinician_id, email, full_name, specialty, is_active"
+PATIENT_SUMMARY_COLUMNS = "patient_id, has_logs, assigned_model_id"
+LOG_FEATURE_COLUMNS = ", ".join(("date", "created_at") + LOG_FEATURES)
+
+# clinician_id -> ClinicianDashboard
+dashboard_cache = TTLCache(maxsize=settings.dashboard_cache_size, ttl_s=settings.dashboard_cache_ttl_s)
+_dashboards_in_flight: dict[str, asyncio.Future] = {}
 
 
 class ClinicianService:
-    def __init__(self, admin_client: Client | None = None) -> None:
-        self.admin = admin_client or get_supabase_admin_client()
+    def __init__(self, admin_client: AsyncClient | None = None) -> None:
+        self.admin = admin_client or get_async_admin_client()
 
-    def get_clinician_profile(self, clinician_id: str) -> ClinicianProfile:
+    async def get_clinician_profile(self, clinician_id: str) -> ClinicianProfile:
         """Fetch clinician row by clinician_id."""
-        resp = (
-            self.admin.table("clinicians")
-            .select("clinician_id, email, full_name, specialty, is_active")
-            .eq("clinician_id", clinician_id)
-            .single()
-            .execute()
-        )
-
-        if not resp.data:
+        with supabase_call("clinicians", "select"):
+            resp = await (
+                self.admin.table("clinicians")
+                .select(CLINICIAN_PROFILE_COLUMNS)
+                .eq("clinician_id", clinician_id)
+                .maybe_single()
+                .execute()
+            )
+
+        if resp is None or not resp.data:
             raise ValueError("Clinician not found")
 
         return ClinicianProfile(**resp.data)
 
-    def get_clinician_patients(self, clinician_id: str) -> List[PatientSummary]:
+    async def get_clinician_patients(self, clinician_id: str) -> List[PatientSummary]:
         """
         Fetch patients assigned to this clinician.
         Assumes patients table has primary_clinician_id FK.
         """
-        resp = (
-            self.admin.table("patients")
-            .select("patient_id, has_logs")
-            .eq("primary_clinician_id", clinician_id)
-            .execute()
-        )
+        with supabase_call("patients", "select"):
+            resp = await (
+                self.admin.table("patients")
+                .select(PATIENT_SUMMARY_COLUMNS)
+                .eq("primary_clinician_id", clinician_id)
+                .execute()
+            )
 
         data = resp.data or []
         return [PatientSummary(**row) for row in data]
 
-    def get_dashboard(self, clinician_id: str) -> ClinicianDashboard:
-        clinician = self.get_clinician_profile(clinician_id)
-        patients = self.get_clinician_patients(clinician_id)
-        return ClinicianDashboard(clinician=clinician, patients=patients)
+    async def get_dashboard(self, clinician_id: str) -> ClinicianDashboard:
+        """
+        Dashboard from the short-lived per-clinician cache. Concurrent misses
+        for the same clinician share one build instead of each querying and
+        scoring the cohort.
+        """
+        dashboard = dashboard_cache.get(clinician_id)
+        if dashboard is not None:
+            return dashboard
+
+        pending = _dashboards_in_flight.get(clinician_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._build_dashboard(clinician_id))
+            _dashboards_in_flight[clinician_id] = pending
+            pending.add_done_callback(lambda _: _dashboards_in_flight.pop(clinician_id, None))
+        # One cancelled request must not cancel the build for the others
+        return await asyncio.shield(pending)
+
+    async def _build_dashboard(self, clinician_id: str) -> ClinicianDashboard:
+        """
+        Clinician profile, assigned patients and each patient's logs from the
+        last 7 days in one round trip (patients are embedded through their
+        primary_clinician_id foreign key, logs through patient_id), then the
+        whole cohort scored in one batch, highest risk first.
+        """
+        with supabase_call("clinicians", "select"):
+            resp = await (
+                self.admin.table("clinicians")
+                .select(
+                    f"{CLINICIAN_PROFILE_COLUMNS}, patients!primary_clinician_id("
+                    f"{PATIENT_SUMMARY_COLUMNS}, patient_logs({LOG_FEATURE_COLUMNS}))"
+                )
+                .eq("clinician_id", clinician_id)
+                .gte("patients.patient_logs.date", window_start().isoformat())
+                .maybe_single()
+                .execute()
+            )
+
+        if resp is None or not resp.data:
+            raise ValueError("Clinician not found")
+
+        row = dict(resp.data)
+        patients = row.pop("patients", None) or []
+        logs = [patient.pop("patient_logs", None) or [] for patient in patients]
+        summaries = [PatientSummary(**patient) for patient in patients]
+        await self._score_cohort(summaries, cohort_features(logs))
+        summaries.sort(key=lambda p: (p.risk_percentage is None, -(p.risk_percentage or 0.0)))
+
+        dashboard = ClinicianDashboard(clinician=ClinicianProfile(**row), patients=summaries)
+        dashboard_cache.put(clinician_id, dashboard)
+        return dashboard
+
+    @staticmethod
+    async def _score_cohort(summaries: List[PatientSummary], features: List[dict | None]) -> None:
+        """Fill in risk and status for every patient with recent logs (one predict_batch call)."""
+        scored = [(summary, row) for summary, row in zip(summaries, features) if row is not None]
+        if not scored:
+            return
+        rows = [
+            {**row, "patient_id": summary.patient_id, "model_id": summary.assigned_model_id}
+            for summary, row in scored
+        ]
+        try:
+            # Off the event loop: routing may load a fine-tuned model from disk
+            results = await asyncio.to_thread(predictor.predict_batch, rows)
+        except RuntimeError as e:
+            print(f"⚠️ Dashboard risk unavailable: {e}")
+            return
+        for (summary, row), result in zip(scored, results):
+            summary.last_log_date = row["last_log_date"]
+            summary.risk_percentage = result["risk_percentage"]
+            summary.status = result["status"]
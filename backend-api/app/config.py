@@ -10,9 +10,76 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_anon_key: str
     supabase_service_role_key: str
+    # HS256 secret Supabase signs access tokens with (Settings > API > JWT secret)
+    supabase_jwt_secret: Optional[str] = None
     environment: str = "development"
     log_level: str = "INFO"
 
+    # Async Supabase client (request path): one pooled, keep-alive HTTP client
+    supabase_pool_max_connections: int = 50
+    supabase_pool_max_keepalive: int = 20
+    supabase_timeout_s: float = 10.0
+
+    # Bulk invites: auth users created concurrently, at most this many at a time
+    invite_concurrency: int = 8
+
+    # Verified access-token claims are cached (until the token expires) in an
+    # LRU of this many tokens
+    jwt_audience: str = "authenticated"
+    jwt_claims_cache_size: int = 10_000
+
+    # user_id -> patient_id (patient_accounts) lookups are cached this long
+    identity_cache_size: int = 10_000
+    identity_cache_ttl_s: float = 300.0
+
+    # Log history pages (GET /logs/...): default and maximum rows per page;
+    # NDJSON streams fetch the history from the database in pages of the default size
+    logs_page_size: int = 100
+    logs_page_max: int = 1000
+
+    # Rolling 7-day log features per patient, updated as logs are written;
+    # entries are reloaded after the TTL to pick up other workers' writes
+    rolling_store_size: int = 10_000
+    rolling_store_ttl_s: float = 600.0
+
+    # Clinician dashboards (with cohort risk) are served from a short-lived
+    # per-clinician cache, absorbing refresh storms
+    dashboard_cache_size: int = 1024
+    dashboard_cache_ttl_s: float = 30.0
+
+    # /ml/predict micro-batching: close a batch after this many requests
+    # or once the collection window (milliseconds) elapses, whichever is first
+    ml_batch_max_size: int = 64
+    ml_batch_window_ms: float = 2.0
+    # Requests allowed to wait for a batch; beyond this /ml/predict answers 503
+    ml_batch_queue_size: int = 1024
+
+    # Inference engine: "xgboost" (Booster.inplace_predict) or "compiled"
+    # (booster exported to NumPy tree arrays, see app/services/tree_engine.py)
+    ml_inference_engine: str = "xgboost"
+
+    # Off-grid /ml/predict inputs are memoised in an LRU of this many entries
+    ml_risk_cache_size: int = 4096
+
+    # Per-feature explanations (/ml/explain) are memoised in their own LRU
+    ml_explain_cache_size: int = 1024
+
+    # Fine-tuned models (patients.assigned_model_id) are loaded on demand
+    # from <ml_models_dir>/<model_id>/ (default: app/ml_engine/models) and kept
+    # resident, least recently used evicted first, within this memory budget
+    ml_models_dir: Optional[str] = None
+    ml_model_memory_budget_mb: float = 512.0
+
+    # Shadow evaluation: a candidate model in <ml_shadow_model_dir> (default:
+    # app/ml_engine/shadow) scores live traffic in the background; at most
+    # this many batches wait for it, beyond that shadow work is dropped
+    ml_shadow_model_dir: Optional[str] = None
+    ml_shadow_queue_size: int = 256
+
+    # Seconds between background model-registry polls (0 disables polling;
+    # POST /ml/admin/reload still works)
+    model_poll_interval_s: float = 300.0
+
     class Config:
         env_file = ".env"
 
@@ -1,6 +1,5 @@
 import os
 import glob
-import pandas as pd
 from fastapi import APIRouter, HTTPException
 
 router = APIRouter(prefix="/demo", tags=["CSV Demo"])
@@ -52,6 +51,8 @@ def get_patient_data(filename: str):
         raise HTTPException(status_code=404, detail="Patient file not found")
 
     try:
+        import pandas as pd  # only the demo needs pandas; keep it off the startup path
+
         df = pd.read_csv(file_path)
         
         # Ensure we have data
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from typing import List
+import asyncio
+import datetime as dt
 
-from app.logs.schemas import LogCreate, LogRead
-from app.logs.service import LogsService
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Literal, Optional
+
+from app.config import settings
+from pydantic import ValidationError
+
+from app.logs.schemas import LogBulkCreate, LogBulkItem, LogBulkResponse, LogCreate, LogHistoryQuery, LogRead
+from app.logs.service import LogsService, decode_cursor, parse_fields
 from app.patients.service import PatientService  # reuse to check mappings
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 def get_logs_service() -> LogsService:
     return LogsService()
@@ -16,6 +27,83 @@ def get_patient_service() -> PatientService:
     return PatientService()
 
 
+def _log_history_query(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.logs_page_max),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated LogRead fields to return"),
+    date_from: Optional[dt.date] = None,
+    date_to: Optional[dt.date] = None,
+    format: Optional[Literal["json", "ndjson"]] = None,
+) -> LogHistoryQuery:
+    """
+    Query parameters shared by the log history endpoints. NDJSON is chosen by
+    `format=ndjson` or an `Accept: application/x-ndjson` header.
+    """
+    if format is None:
+        format = "ndjson" if NDJSON_MEDIA_TYPE in request.headers.get("accept", "") else "json"
+    try:
+        if cursor:
+            decode_cursor(cursor)
+        return LogHistoryQuery(
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+            date_from=date_from,
+            date_to=date_to,
+            format=format,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        )
+
+
+async def _first_page(logs_service: LogsService, patient_id: str, query: LogHistoryQuery):
+    return await logs_service.list_logs_page(
+        patient_id,
+        query.limit or settings.logs_page_size,
+        query.cursor,
+        query.fields,
+        query.date_from,
+        query.date_to,
+    )
+
+
+def _page_response(rows: List[dict], next_cursor: Optional[str]) -> ORJSONResponse:
+    """
+    A page keeps the plain-list body of the original endpoint; the cursor for
+    the next page travels in the X-Next-Cursor header.
+
+    Trusted-row fast path: the rows come straight from patient_logs, selected
+    as exactly the LogRead columns (or the requested projection), so they are
+    serialised as-is instead of being built into LogReads and re-validated
+    against the response_model (which stays for the OpenAPI schema).
+    """
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return ORJSONResponse(rows, headers=headers)
+
+
+def _stream_logs(logs_service: LogsService, patient_id: str, query: LogHistoryQuery) -> StreamingResponse:
+    """One JSON object per line, fetched from the database a page at a time."""
+
+    async def lines():
+        async for row in logs_service.iter_logs(
+            patient_id,
+            page_size=settings.logs_page_size,
+            limit=query.limit,
+            cursor=query.cursor,
+            fields=query.fields,
+            date_from=query.date_from,
+            date_to=query.date_to,
+        ):
+            # Trusted rows, as in _page_response
+            yield orjson.dumps(row) + b"\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
 def _require_auth(request: Request) -> tuple[str, str]:
     user_id = getattr(request.state, "user_id", None)
     role = getattr(request.state, "role", None)
@@ -33,6 +121,17 @@ def _require_auth(request: Request) -> tuple[str, str]:
     return user_id, role
 
 
+async def _my_patient_id(logs_service: LogsService, user_id: str) -> str:
+    """patient_id linked to this auth user; 404 when there is no patient account."""
+    try:
+        return await logs_service.get_patient_id_for_user(user_id)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        )
+
+
 @router.post("/me", response_model=LogRead)
 async def create_my_log(
     request: Request,
@@ -47,15 +146,54 @@ async def create_my_log(
         )
 
     # For patients, find their patient_id via patient_accounts
-    patient_id = logs_service.get_patient_id_for_user(user_id)
-    return logs_service.create_log_for_patient(patient_id, payload)
+    patient_id = await _my_patient_id(logs_service, user_id)
+    return await logs_service.create_log_for_patient(patient_id, payload)
+
+
+@router.post("/me/bulk", response_model=LogBulkResponse, response_model_exclude_none=True)
+async def create_my_logs_bulk(
+    request: Request,
+    payload: LogBulkCreate,
+    logs_service: LogsService = Depends(get_logs_service),
+) -> LogBulkResponse:
+    """
+    Offline / wearable sync: many entries in one request, one patient lookup
+    and one batched insert. Results come back per entry, in input order.
+    """
+    user_id, role = _require_auth(request)
+    if role != "patient":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only patients can create their own logs",
+        )
+
+    valid: List[tuple[int, LogCreate]] = []
+    invalid: List[LogBulkItem] = []
+    for index, entry in enumerate(payload.entries):
+        try:
+            valid.append((index, LogCreate.model_validate(entry)))
+        except ValidationError as exc:
+            invalid.append(LogBulkItem(
+                index=index,
+                status="invalid",
+                errors=exc.errors(include_url=False, include_context=False, include_input=False),
+            ))
+
+    patient_id = await _my_patient_id(logs_service, user_id)
+    results = await logs_service.create_logs_bulk(patient_id, valid) if valid else []
+    results = sorted(results + invalid, key=lambda item: item.index)
+    return LogBulkResponse(
+        created=sum(item.status == "created" for item in results),
+        results=results,
+    )
 
 
 @router.get("/me", response_model=List[LogRead])
 async def list_my_logs(
     request: Request,
+    query: LogHistoryQuery = Depends(_log_history_query),
     logs_service: LogsService = Depends(get_logs_service),
-) -> List[LogRead]:
+):
     user_id, role = _require_auth(request)
     if role != "patient":
         raise HTTPException(
@@ -63,17 +201,21 @@ async def list_my_logs(
             detail="Only patients can read their own logs",
         )
 
-    patient_id = logs_service.get_patient_id_for_user(user_id)
-    return logs_service.list_logs_for_patient(patient_id)
+    patient_id = await _my_patient_id(logs_service, user_id)
+    if query.format == "ndjson":
+        return _stream_logs(logs_service, patient_id, query)
+    rows, next_cursor = await _first_page(logs_service, patient_id, query)
+    return _page_response(rows, next_cursor)
 
 
 @router.get("/patient/{patient_id}", response_model=List[LogRead])
 async def list_logs_for_patient(
     patient_id: str,
     request: Request,
+    query: LogHistoryQuery = Depends(_log_history_query),
     logs_service: LogsService = Depends(get_logs_service),
     patient_service: PatientService = Depends(get_patient_service),
-) -> List[LogRead]:
+):
     user_id, role = _require_auth(request)
     if role != "clinician":
         raise HTTPException(
@@ -81,13 +223,28 @@ async def list_logs_for_patient(
             detail="Clinician access required",
         )
 
-    # Optional: ensure this patient is assigned to this clinician
-    # by checking patients.primary_clinician_id
-    patient = patient_service.get_patient_profile(patient_id)
+    # Ensure this patient is assigned to this clinician by checking
+    # patients.primary_clinician_id. A JSON page is fetched concurrently and
+    # only returned once the check passes; a stream starts after it.
+    try:
+        if query.format == "ndjson":
+            patient, page = await patient_service.get_patient_profile(patient_id), None
+        else:
+            patient, page = await asyncio.gather(
+                patient_service.get_patient_profile(patient_id),
+                _first_page(logs_service, patient_id, query),
+            )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        )
     if patient.primary_clinician_id and patient.primary_clinician_id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not the primary clinician for this patient",
         )
 
-    return logs_service.list_logs_for_patient(patient_id)
+    if page is None:
+        return _stream_logs(logs_service, patient_id, query)
+    return _page_response(*page)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import date, datetime 
+from pydantic import BaseModel, Field
+from typing import Any, List, Literal, Optional
+import datetime as dt
 
 class LogCreate(BaseModel):
     # ML Features (REQUIRED)
@@ -12,9 +12,44 @@ class LogCreate(BaseModel):
     # UI Features (OPTIONAL)
     mood: Optional[str] = None
     notes: Optional[str] = None
-    date: Optional[date] = None # Optional, defaults to today if missing
+    # dt.date, not date: the field name would shadow the type inside the class body
+    date: Optional[dt.date] = None # Optional, defaults to today if missing
 
 class LogRead(LogCreate):
     log_id: str
     patient_id: str
-    created_at: datetime
\ No newline at end of file
+    created_at: dt.datetime
+
+class LogHistoryQuery(BaseModel):
+    """Paging, projection and format options for log history reads."""
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    fields: Optional[List[str]] = None
+    date_from: Optional[dt.date] = None
+    date_to: Optional[dt.date] = None
+    format: Literal["json", "ndjson"] = "json"
+
+
+# Upper bound for one offline sync (POST /logs/me/bulk)
+MAX_BULK_LOGS = 1000
+
+
+class LogBulkCreate(BaseModel):
+    # Validated entry by entry (see LogBulkItem.errors), so one bad entry
+    # doesn't reject the whole sync
+    entries: List[Any] = Field(..., min_length=1, max_length=MAX_BULK_LOGS)
+
+
+class LogBulkItem(BaseModel):
+    index: int
+    # created | duplicate (a later entry in this sync has the same date)
+    # | exists (the day is already logged) | invalid
+    status: Literal["created", "duplicate", "exists", "invalid"]
+    date: Optional[dt.date] = None
+    log: Optional[LogRead] = None
+    errors: Optional[List[dict]] = None
+
+
+class LogBulkResponse(BaseModel):
+    created: int
+    results: List[LogBulkItem]
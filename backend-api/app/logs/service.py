@@ -1,29 +1,64 @@
-from typing import List
+import base64
+import datetime as dt
+import json
+import uuid
+from typing import AsyncIterator, List, Optional
 
-from supabase import Client
+from supabase import AsyncClient
 
-from app.config import get_supabase_admin_client
-from app.logs.schemas import LogCreate, LogRead
+from app.services.identity import get_patient_id_for_user
+from app.services.rolling_features import rolling_store
+from app.services.supabase_client import get_async_admin_client
+from app.logs.schemas import LogBulkItem, LogCreate, LogRead
+from app.utils.metrics import supabase_call
+
+# Exactly the LogRead columns: list rows are returned without re-validation
+LOG_COLUMNS = ", ".join(LogRead.model_fields)
+# Keyset columns: always selected so the next page's cursor can be built
+CURSOR_FIELDS = ("date", "log_id")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Validate a comma-separated projection against LogRead's fields.
+    The cursor columns are always included. Raises ValueError on unknown fields.
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(LogRead.model_fields))
+    if unknown:
+        raise ValueError(f"Unknown log fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*CURSOR_FIELDS, *requested]))
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([str(row["date"]), str(row["log_id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """
+    (date, log_id) from an opaque cursor. Both parts are re-validated because
+    they are spliced into a PostgREST filter. Raises ValueError if malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, log_id = json.loads(raw)
+        return dt.date.fromisoformat(date[:10]).isoformat(), str(uuid.UUID(log_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
 
 
 class LogsService:
-    def __init__(self, admin_client: Client | None = None) -> None:
-        self.admin = admin_client or get_supabase_admin_client()
-
-    # Helper: get patient_id from an auth user_id (patient)
-    def get_patient_id_for_user(self, user_id: str) -> str:
-        resp = (
-            self.admin.table("patient_accounts")
-            .select("patient_id")
-            .eq("user_id", user_id)
-            .single()
-            .execute()
-        )
-        if not resp.data:
-            raise ValueError("No patient account linked to this user")
-        return resp.data["patient_id"]
+    def __init__(self, admin_client: AsyncClient | None = None) -> None:
+        self.admin = admin_client or get_async_admin_client()
+
+    # Helper: get patient_id from an auth user_id (patient), via the shared identity cache
+    async def get_patient_id_for_user(self, user_id: str) -> str:
+        return await get_patient_id_for_user(self.admin, user_id)
 
-    def create_log_for_patient(self, patient_id: str, payload: LogCreate) -> LogRead:
+    async def create_log_for_patient(self, patient_id: str, payload: LogCreate) -> LogRead:
         data = {
             "patient_id": patient_id,
             "date": payload.date.isoformat() if payload.date else "now()",
@@ -37,18 +72,128 @@ class LogsService:
             "notes": payload.notes,
         }
         # CHANGED: Table name is now 'patient_logs'
-        resp = self.admin.table("patient_logs").insert(data).execute()
+        with supabase_call("patient_logs", "insert"):
+            resp = await self.admin.table("patient_logs").insert(data).execute()
         if not resp.data:
             raise RuntimeError("Failed to create log")
+        # Keep the patient's rolling 7-day features current (O(1), no re-scan)
+        rolling_store.record(patient_id, resp.data[0])
         return LogRead(**resp.data[0])
 
-    def list_logs_for_patient(self, patient_id: str) -> List[LogRead]:
-        resp = (
-            self.admin.table("patient_logs") # CHANGED: Table name
-            .select("*") # Select all columns
+    async def create_logs_bulk(self, patient_id: str, entries: List[tuple[int, LogCreate]]) -> List[LogBulkItem]:
+        """
+        Write many (index, entry) pairs with one batched insert. One log per
+        day: within the batch the last entry for a date wins, and days the
+        patient has already logged are skipped, so a retried sync never
+        duplicates. Undated entries count as today.
+        """
+        today = dt.date.today()
+        latest: dict[dt.date, int] = {}
+        for position, (_, entry) in enumerate(entries):
+            latest[entry.date or today] = position
+
+        existing: set[dt.date] = set()
+        if latest:
+            # The date range, not an in.(...) list: 1000 dates would make an
+            # ~11 KB URL, past common proxy limits. Intersected below.
+            with supabase_call("patient_logs", "select"):
+                resp = await (
+                    self.admin.table("patient_logs")
+                    .select("date")
+                    .eq("patient_id", patient_id)
+                    .gte("date", min(latest).isoformat())
+                    .lte("date", max(latest).isoformat())
+                    .execute()
+                )
+            logged = {dt.date.fromisoformat(str(row["date"])[:10]) for row in resp.data or []}
+            existing = logged & latest.keys()
+
+        results: List[LogBulkItem] = []
+        to_insert: List[tuple[LogBulkItem, dict]] = []
+        for position, (index, entry) in enumerate(entries):
+            day = entry.date or today
+            if latest[day] != position:
+                results.append(LogBulkItem(index=index, status="duplicate", date=day))
+            elif day in existing:
+                results.append(LogBulkItem(index=index, status="exists", date=day))
+            else:
+                item = LogBulkItem(index=index, status="created", date=day)
+                results.append(item)
+                to_insert.append((item, {
+                    "patient_id": patient_id,
+                    "date": day.isoformat(),
+                    **entry.model_dump(exclude={"date"}),
+                }))
+
+        if to_insert:
+            with supabase_call("patient_logs", "insert"):
+                resp = await self.admin.table("patient_logs").insert([row for _, row in to_insert]).execute()
+            if not resp.data or len(resp.data) != len(to_insert):
+                raise RuntimeError("Failed to create logs")
+            for (item, _), row in zip(to_insert, resp.data):
+                rolling_store.record(patient_id, row)
+                item.log = LogRead(**row)
+        return results
+
+    async def list_logs_page(
+        self,
+        patient_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        date_from: Optional[dt.date] = None,
+        date_to: Optional[dt.date] = None,
+    ) -> tuple[List[dict], Optional[str]]:
+        """
+        One page of a patient's logs, newest first, keyset-paginated on
+        (date, log_id). Returns the raw rows and the cursor for the next page
+        (None on the last page).
+        """
+        query = (
+            self.admin.table("patient_logs")
+            .select(", ".join(fields) if fields else LOG_COLUMNS)
             .eq("patient_id", patient_id)
-            .order("date", desc=True) # CHANGED: Sort by 'date'
-            .execute()
         )
+        if date_from:
+            query = query.gte("date", date_from.isoformat())
+        if date_to:
+            query = query.lte("date", date_to.isoformat())
+        if cursor:
+            date, log_id = decode_cursor(cursor)
+            query = query.or_(f"date.lt.{date},and(date.eq.{date},log_id.lt.{log_id})")
+
+        with supabase_call("patient_logs", "select"):
+            resp = await (
+                query.order("date", desc=True)
+                .order("log_id", desc=True)
+                # One extra row tells us whether there is a next page
+                .limit(limit + 1)
+                .execute()
+            )
         rows = resp.data or []
-        return [LogRead(**row) for row in rows]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+
+    async def iter_logs(
+        self,
+        patient_id: str,
+        page_size: int,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        date_from: Optional[dt.date] = None,
+        date_to: Optional[dt.date] = None,
+    ) -> AsyncIterator[dict]:
+        """Yield log rows page by page (at most one page in memory), up to `limit` rows."""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            rows, cursor = await self.list_logs_page(patient_id, size, cursor, fields, date_from, date_to)
+            for row in rows:
+                yield row
+            if remaining is not None:
+                remaining -= len(rows)
+            if cursor is None:
+                return
@@ -1,41 +1,71 @@
 """EMP Backend API main entrypoint."""
+import asyncio
+import time
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
+from app import IMPORT_STARTED
 from app.auth.router import router as auth_router
 from app.middleware.auth import JWTAuthMiddleware
+from app.middleware.metrics import MetricsMiddleware
 from app.clinicians.router import router as clinicians_router
 from app.patients.router import router as patients_router
 from app.logs.router import router as logs_router
 from app.ml_engine.router import router as ml_router
 from app.csv_demo import router as csv_demo_router
-from app.utils.model_loader import sync_models_from_cloud 
-from app.services.ml_service import predictor
+from app.utils.model_loader import sync_models_from_cloud
+from app.services.ml_service import predictor, watch_model_registry
+from app.services.supabase_client import close_async_admin_client, init_async_admin_client
+from app.config import settings
+from app.utils import metrics
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 0. DATABASE (one pooled async Supabase client for the request path)
+    await init_async_admin_client()
+
     # 1. DOWNLOAD (Sync files from Supabase)
     print("🔄 Startup: Syncing models from cloud...")
-    sync_models_from_cloud()
-    
-    # 2. LOAD (Read files into RAM)
+    await asyncio.to_thread(sync_models_from_cloud)
+
+    # 2. LOAD + WARM (Read files into RAM and pre-run every prediction path)
     print("📖 Startup: Loading models into memory...")
-    predictor.load_artifacts()  # <--- This triggers the load safely
-    
+    warmup = await asyncio.to_thread(predictor.warmup)
+    app.state.timings["warmup_s"] = warmup["warmup_s"]
+    app.state.timings["model_load_s"] = warmup["load_s"]
+    app.state.warmed_up = True
+    print(f"⏱️ Startup timings: {app.state.timings}")
+
+    # 3. WATCH (Hot-reload new models from the registry without a restart)
+    watcher = None
+    if settings.model_poll_interval_s > 0:
+        watcher = asyncio.create_task(
+            watch_model_registry(predictor, settings.model_poll_interval_s, sync_models_from_cloud)
+        )
+
     print("🚀 System Online.")
     yield
+    if watcher:
+        watcher.cancel()
+    await close_async_admin_client()
     print("🛑 System Shutdown.")
 
-app = FastAPI(lifespan=lifespan)
-
 
 app = FastAPI(
     title="EMP Backend API",
     description="Epilepsy Management Platform API",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    # orjson for every JSON response (dates, UUIDs and NumPy values natively)
+    default_response_class=ORJSONResponse,
 )
+# /ready stays 503 until the lifespan warmup has finished
+app.state.warmed_up = False
+app.state.timings = {}
 
 # CORS for frontends
 app.add_middleware(
@@ -44,6 +74,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers only expose listed headers to the portals (log history paging)
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.add_middleware(
@@ -51,14 +83,24 @@ app.add_middleware(
     public_paths=[
         "/",              # root
         "/health",        # health
+        "/ready",         # readiness
+        "/metrics",       # Prometheus scrape
         "/docs",
         "/openapi.json",
         "/redoc",
-        "/auth/admin",
         "/ml/predict",
-        "/demo"    # keep invite endpoints open for now (optional)
+        "/ml/explain",
+        "/ml/risk-surface",
+        # Keep the single invite endpoints open for now; bulk invites need an admin JWT
+        "/auth/admin/invite-clinician",
+        "/auth/admin/invite-patient",
     ],
+    # Everything under these
+    public_prefixes=["/demo"],
 )
+# Outermost: times every request, including ones rejected by auth
+app.add_middleware(MetricsMiddleware)
+
 # Mount routers
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(clinicians_router, prefix="/clinicians", tags=["clinicians"])
@@ -72,4 +114,27 @@ async def root():
     return {"message": "EMP Backend API is running"}
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 only once the model is loaded and warmed up."""
+    is_ready = app.state.warmed_up and predictor.bundle is not None
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "status": "ready" if is_ready else "warming_up",
+            "model_version": predictor.bundle.version if predictor.bundle else None,
+            "timings": app.state.timings,
+        },
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """In-process latency histograms in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# Everything above (routers, services, config) is import-time cost
+app.state.timings["import_s"] = round(time.perf_counter() - IMPORT_STARTED, 3)
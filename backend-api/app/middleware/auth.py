@@ -1,31 +1,119 @@
-from fastapi import Request, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+import re
+import time
 from typing import List, Optional
 
-class JWTAuthMiddleware(BaseHTTPMiddleware):
-    # 1. ADD THIS INIT METHOD
-    def __init__(self, app, public_paths: Optional[List[str]] = None):
-        super().__init__(app)
-        # Store the list passed from main.py, or use empty list if None
-        self.public_paths = public_paths or []
-
-    async def dispatch(self, request: Request, call_next):
-        
-        # 2. USE self.public_paths INSTEAD OF HARDCODED LIST
-        # Check if the path is in the whitelist OR starts with /auth (standard login routes)
-        if (request.url.path in self.public_paths) or \
-           (request.url.path.startswith("/auth")) or \
-           (request.url.path.startswith("/demo")):
-            return await call_next(request)
-
-        # 3. Verify Token (Existing Logic)
-        auth_header = request.headers.get("Authorization")
-        
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return JSONResponse(
+from fastapi import status
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+
+from app.config import settings
+from app.utils.cache import LRUCache
+from app.utils.metrics import AUTH_MIDDLEWARE_SECONDS
+
+# app_metadata.role of operators (model admin, bulk onboarding)
+ADMIN_ROLE = "admin"
+
+
+def compile_public_matcher(paths: List[str], prefixes: List[str]) -> re.Pattern:
+    """
+    One regex for the whole allow-list: `paths` match exactly, `prefixes`
+    match themselves and anything below them (/auth, /auth/admin/...).
+    """
+    alternatives = [re.escape(path) + r"\Z" for path in paths]
+    alternatives += [re.escape(prefix.rstrip("/")) + r"(?:/|\Z)" for prefix in prefixes]
+    return re.compile("|".join(alternatives) or r"(?!)")
+
+
+class JWTAuthMiddleware:
+    """
+    Verifies the Supabase access token and exposes its user on request.state
+    (`user_id` = sub, `role` = app_metadata.role), which the routers rely on.
+
+    Plain ASGI (no BaseHTTPMiddleware wrapping, streaming responses pass
+    straight through). A token's signature is checked once; its claims are
+    then served from a bounded LRU until the token expires.
+    """
+
+    def __init__(
+        self,
+        app,
+        public_paths: Optional[List[str]] = None,
+        public_prefixes: Optional[List[str]] = None,
+        jwt_secret: Optional[str] = None,
+        audience: Optional[str] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.app = app
+        self._public = compile_public_matcher(public_paths or [], public_prefixes or [])
+        self.jwt_secret = jwt_secret or settings.supabase_jwt_secret
+        self.audience = audience or settings.jwt_audience
+        # token -> (expiry, user_id, role)
+        self._claims = LRUCache(maxsize=cache_size or settings.jwt_claims_cache_size)
+        if not self.jwt_secret:
+            print("⚠️ SUPABASE_JWT_SECRET is not set; every protected route will answer 401.")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        # CORS preflights carry no credentials
+        if scope["method"] == "OPTIONS" or self._public.match(scope["path"]):
+            AUTH_MIDDLEWARE_SECONDS.observe(time.perf_counter() - started, "public")
+            return await self.app(scope, receive, send)
+
+        user = self._authenticate(scope)
+        if user is None:
+            AUTH_MIDDLEWARE_SECONDS.observe(time.perf_counter() - started, "rejected")
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Missing or invalid Authorization header"}
+                content={"detail": "Missing or invalid Authorization header"},
+                headers={"WWW-Authenticate": "Bearer"},
             )
+            return await response(scope, receive, send)
+
+        state = scope.setdefault("state", {})
+        state["user_id"], state["role"] = user
+        AUTH_MIDDLEWARE_SECONDS.observe(time.perf_counter() - started, "authenticated")
+        return await self.app(scope, receive, send)
 
-        return await call_next(request)
\ No newline at end of file
+    def _authenticate(self, scope) -> Optional[tuple[str, Optional[str]]]:
+        """(user_id, role) for a valid bearer token, else None."""
+        header = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                header = value
+                break
+        if not header or not header.startswith(b"Bearer "):
+            return None
+        token = header[7:].strip()
+
+        cached = self._claims.get(token)
+        if cached is not None:
+            expires, user_id, role = cached
+            if expires > time.time():
+                return user_id, role
+            self._claims.pop(token)
+            return None
+
+        claims = self._verify(token)
+        if claims is None:
+            return None
+        user = (str(claims["sub"]), (claims.get("app_metadata") or {}).get("role"))
+        self._claims.put(token, (float(claims["exp"]), *user))
+        return user
+
+    def _verify(self, token: bytes) -> Optional[dict]:
+        if not self.jwt_secret:
+            return None
+        try:
+            return jwt.decode(
+                token.decode("ascii"),
+                self.jwt_secret,
+                algorithms=["HS256"],
+                audience=self.audience,
+                # jose skips the audience check for tokens without an aud claim
+                options={"require_aud": True, "require_exp": True, "require_sub": True},
+            )
+        except (JWTError, UnicodeDecodeError):
+            return None
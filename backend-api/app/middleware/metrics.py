@@ -0,0 +1,40 @@
+import time
+
+from app.utils.metrics import HTTP_REQUEST_SECONDS, current_scope, route_label
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request into emp_http_request_duration_seconds.
+
+    Plain ASGI (no BaseHTTPMiddleware task/stream wrapping) to keep the
+    per-request overhead to two clock reads. The route label is the matched
+    path template (e.g. /patients/{patient_id}), so ids never become labels;
+    the scope is published in `current_scope` so inference metrics recorded
+    further down are labelled the same way.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        token = current_scope.set(scope)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, route_label(scope), scope["method"], str(status_code)
+            )
+            current_scope.reset(token)
@@ -1,39 +1,266 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import asyncio
+import math
+from typing import Literal, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import BaseModel, Field, model_validator
 # NEW IMPORT: Pointing to the correct global predictor
-from app.services.ml_service import predictor
+from app.services.ml_service import (
+    HIGH_RISK_THRESHOLD,
+    MEDIUM_RISK_THRESHOLD,
+    BatcherOverloaded,
+    batcher,
+    predictor,
+)
+from app.middleware.auth import ADMIN_ROLE
+from app.utils.model_loader import sync_models_from_cloud
 
 router = APIRouter(prefix="/ml", tags=["Machine Learning"])
 
+# Upper bound for a single batch call (keeps one request from hogging a worker)
+MAX_BATCH_ROWS = 10_000
+# Same bound for the number of cells in one risk surface
+MAX_SURFACE_CELLS = MAX_BATCH_ROWS
+
+def _ensure_admin(request: Request) -> None:
+    """Any valid JWT reaches /ml/admin; only the admin role may use it."""
+    if not getattr(request.state, "user_id", None):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+    if getattr(request.state, "role", None) != ADMIN_ROLE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+
 # Input matches the Database/CSV columns exactly
 class PredictionRequest(BaseModel):
     hours_of_sleep: float
     stress_level: int
     medication_taken: int  # 1 for Yes, 0 for No (ML expects numbers)
-    eeg_profile_id: str = "chb01" # Default to chb01 for now
+    eeg_profile_id: str = "chb01" # eeg_source_id or subject prefix from master_eeg_features.csv
+    model_id: Optional[str] = None # patients.assigned_model_id; None = foundation model
+
+
+class BatchPredictionRequest(BaseModel):
+    rows: list[PredictionRequest] = Field(..., max_length=MAX_BATCH_ROWS)
+    # Attach per-feature contributions to every result
+    explain: bool = False
+
+
+class Explanation(BaseModel):
+    """Log-odds contributions: base_value + sum(contributions) is the model margin."""
+    base_value: float
+    # Feature -> contribution, largest magnitude first
+    contributions: dict[str, float]
+
+
+class PredictionResult(BaseModel):
+    risk_percentage: float
+    status: str
+    baseline_used: str
+    explanation: Explanation | None = None
+
+
+class ExplanationResult(BaseModel):
+    risk_percentage: float
+    status: str
+    baseline_used: str
+    explanation: Explanation
+
+
+class BatchPredictionResponse(BaseModel):
+    results: list[PredictionResult]
+
+
+class GridRange(BaseModel):
+    """Inclusive range: start, start + step, ... up to stop."""
+    start: float = Field(..., allow_inf_nan=False)
+    stop: float = Field(..., allow_inf_nan=False)
+    step: float = Field(..., gt=0, allow_inf_nan=False)
+
+    @model_validator(mode="after")
+    def _check_bounds(self):
+        if self.stop < self.start:
+            raise ValueError("stop must be >= start")
+        if not math.isfinite((self.stop - self.start) / self.step):
+            raise ValueError("range has too many steps")
+        return self
+
+    def count(self) -> int:
+        """Number of values, known without building them."""
+        return int(np.floor((self.stop - self.start) / self.step + 1e-9)) + 1
+
+    def values(self) -> list[float]:
+        return [round(self.start + i * self.step, 6) for i in range(self.count())]
+
+
+class RiskSurfaceRequest(BaseModel):
+    eeg_profile_id: str = "chb01"
+    model_id: Optional[str] = None
+    # Defaults mirror the dashboard sliders
+    sleep: GridRange = GridRange(start=0, stop=12, step=0.5)
+    stress: GridRange = GridRange(start=1, stop=5, step=1)
+    medication: list[Literal[0, 1]] = Field(default=[0, 1], min_length=1, max_length=2)
+
+
+class RiskSurfaceResponse(BaseModel):
+    baseline_used: str
+    sleep_values: list[float]
+    stress_values: list[float]
+    medication_values: list[int]
+    # Indexed [medication][stress][sleep]
+    risk_percentage: list[list[list[float]]]
+    status: list[list[list[str]]]
+    thresholds: dict[str, float]
+
+
+def _to_model_input(data: PredictionRequest) -> dict:
+    return {
+        "hours_of_sleep": data.hours_of_sleep,
+        "stress_level": data.stress_level,
+        "medication_taken": data.medication_taken,
+
+        # Anonymous what-if inputs have no history, so the current values stand
+        # in for the 7-day avgs; patient-scoped risk (GET /patients/me/risk)
+        # reads the real averages from the rolling store.
+        "hours_of_sleep_7day_avg": data.hours_of_sleep,
+        "stress_level_7day_avg": data.stress_level,
+        "medication_taken_7day_avg": data.medication_taken,
+
+        "eeg_profile_id": data.eeg_profile_id,
+        "model_id": data.model_id,
+    }
+
 
 @router.post("/predict")
-def get_seizure_risk(data: PredictionRequest):
+async def get_seizure_risk(data: PredictionRequest):
     try:
-        # Call the NEW predictor logic
-        result = predictor.predict({
-            "hours_of_sleep": data.hours_of_sleep,
-            "stress_level": data.stress_level,
-            "medication_taken": data.medication_taken,
-            
-            # TODO: In the future, we will calculate these 7-day avgs from the DB.
-            # For now, we pass current values to get the connection working.
-            "hours_of_sleep_7day_avg": data.hours_of_sleep,
-            "stress_level_7day_avg": data.stress_level,
-            "medication_taken_7day_avg": data.medication_taken,
-            
-            "patient_id": data.eeg_profile_id 
-        })
-        
-        if "error" in result:
-             raise HTTPException(status_code=500, detail=result["error"])
-
-        return result
+        # Concurrent requests are coalesced into one booster call
+        return await batcher.submit(_to_model_input(data))
 
+    except BatcherOverloaded as e:
+        # Shed load instead of queueing without bound
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/predict/batch", response_model=BatchPredictionResponse, response_model_exclude_none=True)
+def get_seizure_risk_batch(data: BatchPredictionRequest):
+    """
+    Score a whole cohort in one call: one feature matrix, one booster call.
+    Results are returned in the same order as the submitted rows.
+    With `explain`, each result also carries its per-feature contributions.
+    """
+    rows = [_to_model_input(row) for row in data.rows]
+    try:
+        results = predictor.explain_batch(rows) if data.explain else predictor.predict_batch(rows)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return BatchPredictionResponse(results=results)
+
+
+@router.post("/explain", response_model=ExplanationResult)
+def explain_seizure_risk(data: PredictionRequest):
+    """
+    Risk plus "why is this high": per-feature contributions from the
+    booster's native pred_contribs (TreeSHAP), no shap import needed.
+    """
+    try:
+        return predictor.explain(_to_model_input(data))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/batcher/stats", dependencies=[Depends(_ensure_admin)])
+def get_batcher_stats():
+    """Micro-batcher queue depth and batch-size distribution."""
+    return batcher.stats()
+
+
+@router.post("/risk-surface", response_model=RiskSurfaceResponse)
+def get_risk_surface(data: RiskSurfaceRequest):
+    """
+    Full what-if surface (sleep x stress x medication) for one EEG profile,
+    scored in a single inference pass, so the simulator can draw a heatmap
+    without one /ml/predict call per point.
+    """
+    medication_values = sorted(set(data.medication))
+
+    # Sized before any grid is built, so an oversized request costs nothing
+    cells = data.sleep.count() * data.stress.count() * len(medication_values)
+    if cells > MAX_SURFACE_CELLS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Risk surface too large ({cells} cells, max {MAX_SURFACE_CELLS})",
+        )
+    sleep_values = data.sleep.values()
+    stress_values = data.stress.values()
+
+    try:
+        surface = predictor.risk_surface(
+            {"eeg_profile_id": data.eeg_profile_id, "model_id": data.model_id},
+            sleep_values,
+            stress_values,
+            medication_values,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return RiskSurfaceResponse(
+        sleep_values=sleep_values,
+        stress_values=stress_values,
+        medication_values=medication_values,
+        thresholds={"medium": MEDIUM_RISK_THRESHOLD, "high": HIGH_RISK_THRESHOLD},
+        **surface,
+    )
+
+
+@router.get("/admin/model", dependencies=[Depends(_ensure_admin)])
+def get_model_status():
+    """Version and load time of the model currently serving, plus resident fine-tuned models."""
+    return predictor.status()
+
+
+@router.get("/admin/shadow", dependencies=[Depends(_ensure_admin)])
+def get_shadow_stats():
+    """
+    Candidate-vs-serving comparison on live traffic: risk-band agreement,
+    risk deltas and how much shadow work was dropped under load.
+    """
+    return predictor.shadow.stats()
+
+
+@router.post("/admin/shadow/reset", dependencies=[Depends(_ensure_admin)])
+def reset_shadow_stats():
+    """Start a fresh comparison window."""
+    predictor.shadow.reset()
+    return predictor.shadow.stats()
+
+
+@router.post("/admin/reload", dependencies=[Depends(_ensure_admin)])
+async def reload_model(sync: bool = True, force: bool = False):
+    """
+    Hot-swap the model without a restart: optionally pull the latest artifacts
+    from the registry, then load + warm them in a standby slot and swap.
+    Without `force`, nothing is reloaded if the artifacts on disk are unchanged.
+    """
+    if sync:
+        await asyncio.to_thread(sync_models_from_cloud)
+
+    reload = predictor.load_model if force else predictor.reload_if_changed
+    reloaded = await asyncio.to_thread(reload)
+    if force and not reloaded:
+        raise HTTPException(status_code=500, detail="Model reload failed; previous model still serving")
+
+    return {"reloaded": reloaded, **predictor.status()}
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 
-from app.patients.schemas import PatientMeResponse
+from app.patients.schemas import PatientMeResponse, PatientRisk
 from app.patients.service import PatientService
+from app.services.ml_service import BatcherOverloaded, batcher
 
 router = APIRouter()
 
@@ -41,8 +42,7 @@ async def get_my_patient_profile(
     user_id, role = _ensure_patient(request)
 
     try:
-        patient_id = service.get_patient_id_for_user(user_id)
-        patient = service.get_patient_profile(patient_id)
+        patient = await service.get_patient_profile_for_user(user_id)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,3 +54,45 @@ async def get_my_patient_profile(
         role=role,
         patient=patient,
     )
+
+
+@router.get("/me/risk", response_model=PatientRisk)
+async def get_my_current_risk(
+    request: Request,
+    service: PatientService = Depends(get_patient_service),
+) -> PatientRisk:
+    """
+    Current seizure risk from the patient's own logs: the latest day's values
+    and their 7-day averages (as in training), scored by the assigned model.
+    """
+    user_id, role = _ensure_patient(request)
+
+    try:
+        patient = await service.get_patient_profile_for_user(user_id)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        )
+
+    features = await service.get_rolling_features(patient.patient_id)
+    if features is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No logs in the last 7 days",
+        )
+
+    try:
+        result = await batcher.submit(
+            {**features, "patient_id": patient.patient_id, "model_id": patient.assigned_model_id}
+        )
+    except BatcherOverloaded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return PatientRisk(patient_id=patient.patient_id, **features, **result)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+import datetime as dt
 
 
 class PatientProfile(BaseModel):
@@ -12,3 +13,15 @@ class PatientMeResponse(BaseModel):
     user_id: str
     role: str
     patient: PatientProfile
+
+
+class PatientRisk(BaseModel):
+    patient_id: str
+    # Day of the latest log the risk is computed from
+    last_log_date: dt.date
+    risk_percentage: float
+    status: str
+    baseline_used: str
+    hours_of_sleep_7day_avg: float
+    stress_level_7day_avg: float
+    medication_taken_7day_avg: float
@@ -1,43 +1,75 @@
-from supabase import Client
+from typing import Optional
 
-from app.config import get_supabase_admin_client
+from supabase import AsyncClient
+
+from app.services.identity import get_patient_id_for_user, patient_id_cache
+from app.services.rolling_features import rolling_store
+from app.services.supabase_client import get_async_admin_client
 from app.patients.schemas import PatientProfile
+from app.utils.metrics import supabase_call
+
+PATIENT_PROFILE_COLUMNS = "patient_id, assigned_model_id, primary_clinician_id"
 
 
 class PatientService:
-    def __init__(self, admin_client: Client | None = None) -> None:
-        self.admin = admin_client or get_supabase_admin_client()
+    def __init__(self, admin_client: AsyncClient | None = None) -> None:
+        self.admin = admin_client or get_async_admin_client()
 
-    def get_patient_id_for_user(self, user_id: str) -> str:
+    async def get_patient_id_for_user(self, user_id: str) -> str:
         """
-        Look up patient_id in patient_accounts for this auth user.
+        Look up patient_id in patient_accounts for this auth user
+        (served from the shared identity cache when fresh).
         """
-        resp = (
-            self.admin.table("patient_accounts")
-            .select("patient_id")
-            .eq("user_id", user_id)
-            .single()
-            .execute()
-        )
-
-        if not resp.data:
-            raise ValueError("No patient account linked to this user")
+        return await get_patient_id_for_user(self.admin, user_id)
 
-        return resp.data["patient_id"]
-
-    def get_patient_profile(self, patient_id: str) -> PatientProfile:
+    async def get_patient_profile(self, patient_id: str) -> PatientProfile:
         """
         Fetch patient row by patient_id.
         """
-        resp = (
-            self.admin.table("patients")
-            .select("patient_id, assigned_model_id, primary_clinician_id")
-            .eq("patient_id", patient_id)
-            .single()
-            .execute()
-        )
+        with supabase_call("patients", "select"):
+            resp = await (
+                self.admin.table("patients")
+                .select(PATIENT_PROFILE_COLUMNS)
+                .eq("patient_id", patient_id)
+                .maybe_single()
+                .execute()
+            )
 
-        if not resp.data:
+        if resp is None or not resp.data:
             raise ValueError("Patient not found")
 
         return PatientProfile(**resp.data)
+
+    async def get_patient_profile_for_user(self, user_id: str) -> PatientProfile:
+        """
+        Patient row for this auth user in one round trip: the patients row is
+        embedded in the patient_accounts lookup (or fetched directly when the
+        patient_id is already cached).
+        """
+        patient_id = patient_id_cache.get(user_id)
+        if patient_id is not None:
+            return await self.get_patient_profile(patient_id)
+
+        with supabase_call("patient_accounts", "select"):
+            resp = await (
+                self.admin.table("patient_accounts")
+                .select(f"patient_id, patients({PATIENT_PROFILE_COLUMNS})")
+                .eq("user_id", user_id)
+                .maybe_single()
+                .execute()
+            )
+
+        if resp is None or not resp.data:
+            raise ValueError("No patient account linked to this user")
+        if not resp.data.get("patients"):
+            raise ValueError("Patient not found")
+
+        patient_id_cache.put(user_id, resp.data["patient_id"])
+        return PatientProfile(**resp.data["patients"])
+
+    async def get_rolling_features(self, patient_id: str) -> Optional[dict]:
+        """
+        Latest day's log values and 7-day averages from the rolling store
+        (None without logs in the last 7 days).
+        """
+        return await rolling_store.features(self.admin, patient_id)
@@ -0,0 +1,80 @@
+import csv
+import os
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+
+ID_COLUMN = "eeg_source_id"
+
+
+class EEGProfiles:
+    """
+    Immutable snapshot of master_eeg_features.csv.
+
+    Features live in one (n_profiles, n_features) float array; `index` maps an
+    eeg_source_id to its row. Short ids such as "chb01" (what the dashboard
+    sends) resolve to the first recording of that subject, e.g. "chb01_01".
+    """
+
+    def __init__(self, ids: list[str], feature_names: list[str], values: np.ndarray, fingerprint: tuple):
+        self.ids = ids
+        self.feature_names = feature_names
+        self.values = values
+        self.fingerprint = fingerprint
+        self.index = {profile_id: i for i, profile_id in enumerate(ids)}
+
+        self._aliases: dict[str, str] = {}
+        for profile_id in sorted(ids):
+            subject = profile_id.split("_", 1)[0]
+            self._aliases.setdefault(subject, profile_id)
+
+        # One read-only mapping per row, built once so lookups allocate nothing
+        self._rows = [dict(zip(feature_names, map(float, row))) for row in values]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def resolve(self, profile_id: str | None) -> str | None:
+        if not profile_id:
+            return None
+        if profile_id in self.index:
+            return profile_id
+        return self._aliases.get(profile_id)
+
+    def features(self, profile_id: str) -> Mapping[str, float]:
+        """Feature mapping for an exact (already resolved) eeg_source_id."""
+        return self._rows[self.index[profile_id]]
+
+    def as_dict(self) -> dict[str, Mapping[str, float]]:
+        return {profile_id: self._rows[i] for i, profile_id in enumerate(self.ids)}
+
+
+def file_fingerprint(path: Path) -> tuple:
+    """Cheap change detector for an artifact on disk."""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_profiles(path: Path) -> EEGProfiles:
+    fingerprint = file_fingerprint(path)
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        if ID_COLUMN not in header:
+            raise ValueError(f"{path} has no '{ID_COLUMN}' column")
+        id_col = header.index(ID_COLUMN)
+        feature_cols = [i for i, name in enumerate(header) if i != id_col]
+
+        ids, rows = [], []
+        for record in reader:
+            if not record:
+                continue
+            ids.append(record[id_col])
+            rows.append([float(record[i]) for i in feature_cols])
+
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{path} contains duplicate {ID_COLUMN} values")
+    values = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(feature_cols))
+    return EEGProfiles(ids, [header[i] for i in feature_cols], values, fingerprint)
+
@@ -0,0 +1,120 @@
+import json
+import threading
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+
+# Suffix used by training.py for the rolling features; when a caller omits one,
+# the current value of its base column is used instead.
+ROLLING_SUFFIX = "_7day_avg"
+
+
+class FeatureAssembler:
+    """
+    Turns request dicts into model-ready float32 rows without pandas.
+
+    Built once from the `feature_order` in model_signature.json: every column
+    name is resolved to a fixed index up front, so assembling a row is a
+    straight fill of a preallocated NumPy buffer.
+    """
+
+    def __init__(self, feature_order: Iterable[str]):
+        self.feature_order: list[str] = list(feature_order)
+        if not self.feature_order:
+            raise ValueError("Model signature has an empty feature_order")
+        if len(set(self.feature_order)) != len(self.feature_order):
+            raise ValueError("Model signature contains duplicate feature names")
+
+        self.index: dict[str, int] = {name: i for i, name in enumerate(self.feature_order)}
+
+        # (column index, column name, fallback key) resolved once per signature
+        self._plan: list[tuple[int, str, str | None]] = []
+        for i, name in enumerate(self.feature_order):
+            fallback = name[: -len(ROLLING_SUFFIX)] if name.endswith(ROLLING_SUFFIX) else None
+            self._plan.append((i, name, fallback))
+
+        self._local = threading.local()
+
+    @classmethod
+    def from_signature(cls, signature_path: Path) -> "FeatureAssembler":
+        with open(signature_path, "r") as f:
+            signature = json.load(f)
+        if "feature_order" not in signature:
+            raise ValueError(f"{signature_path} has no 'feature_order'")
+        return cls(signature["feature_order"])
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_order)
+
+    def check_booster(self, booster) -> None:
+        """Fail fast if the booster was trained on a different column layout."""
+        booster_features = booster.feature_names
+        if booster_features is None:
+            if booster.num_features() != self.n_features:
+                raise ValueError(
+                    f"Booster expects {booster.num_features()} features, "
+                    f"signature lists {self.n_features}"
+                )
+            return
+        if list(booster_features) != self.feature_order:
+            missing = sorted(set(booster_features) - set(self.feature_order))
+            extra = sorted(set(self.feature_order) - set(booster_features))
+            if not missing and not extra:
+                raise ValueError("Model signature lists the booster features in a different order")
+            raise ValueError(
+                "Model signature does not match booster feature names "
+                f"(missing from signature: {missing}, not in booster: {extra})"
+            )
+
+    def fill(self, out: np.ndarray, input_data: Mapping, defaults: Mapping) -> np.ndarray:
+        """
+        Write one row into `out` (1-D, length n_features).
+        Lookup order per column: input_data, base column (rolling features only),
+        defaults (e.g. EEG baseline), then 0.
+        """
+        for i, name, fallback in self._plan:
+            value = input_data.get(name)
+            if value is None and fallback is not None:
+                value = input_data.get(fallback)
+            if value is None:
+                value = defaults.get(name, 0.0)
+            out[i] = value
+        return out
+
+    def assemble(self, input_data: Mapping, defaults: Mapping) -> np.ndarray:
+        """
+        Fill this thread's preallocated (1, n_features) row and return it.
+        The buffer is reused by the next call on the same thread, so callers
+        must finish with it (i.e. predict) before assembling again.
+        """
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = np.zeros((1, self.n_features), dtype=np.float32)
+            self._local.row = row
+        self.fill(row[0], input_data, defaults)
+        return row
+
+    def assemble_batch(self, rows: list[Mapping], defaults: Mapping) -> np.ndarray:
+        """Pack many request dicts into one contiguous (n_rows, n_features) matrix."""
+        matrix = np.empty((len(rows), self.n_features), dtype=np.float32)
+        for i, input_data in enumerate(rows):
+            self.fill(matrix[i], input_data, defaults)
+        return matrix
+
+    def assemble_columns(
+        self, n_rows: int, columns: Mapping[str, np.ndarray], defaults: Mapping
+    ) -> np.ndarray:
+        """
+        Build an (n_rows, n_features) matrix column-wise: named columns come from
+        `columns` (rolling features fall back to their base column), everything
+        else is broadcast from `defaults`. Used for grid / what-if scoring.
+        """
+        matrix = np.empty((n_rows, self.n_features), dtype=np.float32)
+        for i, name, fallback in self._plan:
+            values = columns.get(name)
+            if values is None and fallback is not None:
+                values = columns.get(fallback)
+            matrix[:, i] = values if values is not None else defaults.get(name, 0.0)
+        return matrix
@@ -0,0 +1,42 @@
+"""Shared user_id -> patient_id resolution (patient_accounts bridge table)."""
+from supabase import AsyncClient
+
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import supabase_call
+
+# The link is written once at invite time and practically never changes,
+# so patient requests skip the bridge query while an entry is fresh.
+patient_id_cache = TTLCache(maxsize=settings.identity_cache_size, ttl_s=settings.identity_cache_ttl_s)
+
+
+async def get_patient_id_for_user(admin: AsyncClient, user_id: str) -> str:
+    """
+    Look up patient_id in patient_accounts for this auth user.
+    Raises ValueError if no patient account is linked.
+    """
+    patient_id = patient_id_cache.get(user_id)
+    if patient_id is not None:
+        return patient_id
+
+    with supabase_call("patient_accounts", "select"):
+        resp = await (
+            admin.table("patient_accounts")
+            .select("patient_id")
+            .eq("user_id", user_id)
+            # No row resolves to None; single() would raise APIError (PGRST116)
+            .maybe_single()
+            .execute()
+        )
+
+    if resp is None or not resp.data:
+        raise ValueError("No patient account linked to this user")
+
+    patient_id = resp.data["patient_id"]
+    patient_id_cache.put(user_id, patient_id)
+    return patient_id
+
+
+def invalidate_patient_id(user_id: str) -> None:
+    """Forget a cached link (call whenever patient_accounts changes for this user)."""
+    patient_id_cache.pop(user_id)
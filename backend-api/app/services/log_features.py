@@ -0,0 +1,65 @@
+"""Model input rows derived from patient_logs (current values + 7-day averages)."""
+import datetime as dt
+
+import numpy as np
+
+# training.py averages the lifestyle inputs over a 7-day rolling window
+ROLLING_WINDOW_DAYS = 7
+LOG_FEATURES = ("hours_of_sleep", "stress_level", "medication_taken")
+
+
+def window_start(today: dt.date | None = None) -> dt.date:
+    """First day of the rolling window that ends (inclusive) today."""
+    return (today or dt.date.today()) - dt.timedelta(days=ROLLING_WINDOW_DAYS - 1)
+
+
+def cohort_features(logs_by_patient: list[list[dict]]) -> list[dict | None]:
+    """
+    One model input per patient from their logs inside the window: the latest
+    day's values plus the window averages (`<feature>_7day_avg`), and that
+    day under "last_log_date". None for patients without logs.
+
+    A day counts once: when it was logged twice, the later log (by
+    created_at) wins, as in the RollingFeatureStore. Computed column-wise over
+    the whole cohort (one flat array, grouped sums), so the cost is one pass
+    over the logs rather than a loop per patient.
+    """
+    n = len(logs_by_patient)
+    counts = np.fromiter((len(logs) for logs in logs_by_patient), dtype=np.int64, count=n)
+    if not counts.any():
+        return [None] * n
+
+    flat = [log for logs in logs_by_patient for log in logs]
+    owner = np.repeat(np.arange(n), counts)
+    values = np.array(
+        [[float(log.get(name) or 0.0) for name in LOG_FEATURES] for log in flat],
+        dtype=np.float64,
+    )
+    # ISO dates / timestamps sort chronologically as strings
+    dates = np.array([str(log["date"])[:10] for log in flat])
+    created = np.array([str(log.get("created_at") or "") for log in flat])
+
+    # Sorted by (owner, date, created_at): the last row of each (owner, date)
+    # run is that day's effective log, the last of each owner run the latest day
+    order = np.lexsort((created, dates, owner))
+    owner, dates, values = owner[order], dates[order], values[order]
+    last_of_day = np.ones(len(order), dtype=bool)
+    last_of_day[:-1] = (owner[1:] != owner[:-1]) | (dates[1:] != dates[:-1])
+    owner, dates, values = owner[last_of_day], dates[last_of_day], values[last_of_day]
+
+    days = np.bincount(owner, minlength=n)
+    sums = np.zeros((n, len(LOG_FEATURES)))
+    np.add.at(sums, owner, values)
+    means = sums / np.maximum(days, 1)[:, None]
+
+    has_logs = days > 0
+    latest = np.cumsum(days)[has_logs] - 1
+
+    rows: list[dict | None] = [None] * n
+    for patient, last in zip(np.flatnonzero(has_logs), latest):
+        row = {"last_log_date": dt.date.fromisoformat(str(dates[last]))}
+        for j, name in enumerate(LOG_FEATURES):
+            row[name] = float(values[last, j])
+            row[f"{name}_7day_avg"] = float(means[patient, j])
+        rows[patient] = row
+    return rows
@@ -1,114 +1,746 @@
 import os
-import xgboost as xgb
-import pandas as pd
+import asyncio
+import threading
+import time
 import numpy as np
 from pathlib import Path
 
+from app.config import settings
+from app.services.model_bundle import (
+    FOUNDATION_MODEL_ID,
+    INFERENCE_ENGINES,
+    ArtifactPaths,
+    ModelBundle,
+)
+from app.services.model_registry import ModelRegistry
+from app.services.shadow import ShadowEvaluator
+from app.utils.cache import LRUCache
+from app.utils.metrics import INFERENCE_STAGE_SECONDS, current_scope, inference_stage, route_label
+
+# Lifestyle inputs that, together with the EEG profile, identify a prediction
+_CACHE_KEY_FIELDS = (
+    ("hours_of_sleep", "hours_of_sleep"),
+    ("stress_level", "stress_level"),
+    ("medication_taken", "medication_taken"),
+    ("hours_of_sleep_7day_avg", "hours_of_sleep"),
+    ("stress_level_7day_avg", "stress_level"),
+    ("medication_taken_7day_avg", "medication_taken"),
+)
+
+# Clinical risk bands (probability strictly above the threshold)
+HIGH_RISK_THRESHOLD = 0.7
+MEDIUM_RISK_THRESHOLD = 0.4
+
+MODEL_FILE = "foundation_model_v1.ubj"
+# assigned_model_id values served by the foundation model itself
+DEFAULT_MODEL_IDS = (None, "", FOUNDATION_MODEL_ID, "foundation_model_v1")
+SIGNATURE_FILE = "model_signature.json"
+EEG_FILE = "master_eeg_features.csv"
+
+
 class MLService:
-    def __init__(self):
-        self.model = None
-        self.model_path = self._find_model_path()
-        self.load_model()
+    """
+    Serves predictions from the active ModelBundle.
+
+    Loading is double-buffered: a new bundle is built and warmed in a standby
+    slot while the current one keeps serving, then swapped in with a single
+    reference assignment. Every prediction reads `self._bundle` once, so
+    in-flight requests finish on the bundle they started with.
 
-    def _find_model_path(self):
-        # 1. Try to find the model relative to the backend folder
+    Inputs carrying a `model_id` (patients.assigned_model_id) are routed to
+    that fine-tuned model through the ModelRegistry; unknown ids fall back
+    to the foundation model.
+    """
+
+    def __init__(
+        self,
+        engine: str = "xgboost",
+        cache_size: int = 4096,
+        explain_cache_size: int = 1024,
+        models_dir: str | None = None,
+        memory_budget_mb: float = 512.0,
+        shadow_dir: str | None = None,
+        shadow_queue_size: int = 256,
+    ):
+        # Nothing heavy happens here: the model is loaded by warmup() / load_model()
+        if engine not in INFERENCE_ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}', expected one of {INFERENCE_ENGINES}")
+        self.engine = engine
+        self.cache_size = cache_size
+        self.explain_cache_size = explain_cache_size
+        self.paths = self._find_artifacts()
+        print(f"🔍 Looking for model at: {self.paths.model}")
+        self._bundle: ModelBundle | None = None
+        # Serialises loaders; readers never take it
+        self._load_lock = threading.Lock()
+
+        engine_dir = Path(__file__).resolve().parent.parent / "ml_engine"
+        self.registry = ModelRegistry(
+            root=Path(models_dir) if models_dir else engine_dir / "models",
+            model_file=MODEL_FILE,
+            signature_file=SIGNATURE_FILE,
+            eeg_path=self.paths.eeg,
+            memory_budget_bytes=int(memory_budget_mb * 2**20),
+            engine=engine,
+            cache_size=cache_size,
+            explain_cache_size=explain_cache_size,
+        )
+        # Ids already warned about; bounded, since model_id comes from clients
+        self._unknown_models = LRUCache(maxsize=1024)
+
+        # Candidate model scored against live traffic (off unless its artifacts exist)
+        shadow_dir = Path(shadow_dir) if shadow_dir else engine_dir / "shadow"
+        self.shadow = ShadowEvaluator(
+            paths=ArtifactPaths(
+                model=shadow_dir / MODEL_FILE,
+                signature=shadow_dir / SIGNATURE_FILE,
+                eeg=self.paths.eeg,
+            ),
+            risk_status=self.risk_status,
+            queue_size=shadow_queue_size,
+            engine=engine,
+        )
+
+    def _find_artifacts(self) -> ArtifactPaths:
         current_dir = Path(__file__).resolve().parent
-        # Go up 3 levels: app/services -> app -> backend-api -> EMP
-        project_root = current_dir.parent.parent.parent
-        
-        target_path = project_root / "ml-pipeline" / "models" / "foundation_model_v1.ubj"
-        
-        print(f"🔍 Looking for model at: {target_path}")
-        return target_path
-
-    def load_model(self):
+        # 1. Registry sync target (app/ml_engine, see utils/model_loader.py)
+        engine_dir = current_dir.parent / "ml_engine"
+        # 2. Local pipeline output. Go up 3 levels: app/services -> app -> backend-api -> EMP
+        pipeline_dir = current_dir.parent.parent.parent / "ml-pipeline" / "models"
+
+        model_dir = engine_dir if (engine_dir / MODEL_FILE).exists() else pipeline_dir
+        return ArtifactPaths(
+            model=model_dir / MODEL_FILE,
+            # training.py writes the signature next to the model
+            signature=model_dir / SIGNATURE_FILE,
+            eeg=engine_dir / EEG_FILE,
+        )
+
+    def _refresh_paths(self) -> ArtifactPaths:
+        """
+        Re-pick the artifact directory: a registry sync may create the model
+        in app/ml_engine after startup, which then takes over from the
+        pipeline output without a restart.
+        """
+        paths = self._find_artifacts()
+        if paths != self.paths:
+            print(f"🔍 Model artifacts moved to: {paths.model}")
+            self.paths = paths
+        return paths
+
+    # --- Active bundle (compat accessors) ---
+    @property
+    def bundle(self) -> ModelBundle | None:
+        return self._bundle
+
+    @property
+    def model(self):
+        bundle = self._bundle
+        return bundle.model if bundle else None
+
+    @property
+    def assembler(self):
+        bundle = self._bundle
+        return bundle.assembler if bundle else None
+
+    @property
+    def forest(self):
+        bundle = self._bundle
+        return bundle.forest if bundle else None
+
+    @property
+    def risk_table(self):
+        bundle = self._bundle
+        return bundle.risk_table if bundle else None
+
+    def load_model(self) -> bool:
+        """
+        Build + warm a bundle from the artifacts on disk and swap it in.
+        On failure the current bundle (if any) keeps serving. Returns True on swap.
+        """
+        with self._load_lock:
+            try:
+                standby = ModelBundle.load(
+                    self._refresh_paths(),
+                    engine=self.engine,
+                    cache_size=self.cache_size,
+                    explain_cache_size=self.explain_cache_size,
+                )
+                standby.warm()
+            except Exception as e:
+                print(f"❌ Failed to load model: {e}")
+                if self._bundle is not None:
+                    print(f"   ➡️ Still serving model {self._bundle.version}.")
+                return False
+
+            previous = self._bundle
+            self._bundle = standby  # atomic swap
+            swapped_from = f" (replacing {previous.version})" if previous else ""
+            print(
+                f"✅ XGBoost Model {standby.version} loaded successfully!{swapped_from} "
+                f"({standby.risk_table.size} simulator risks precomputed)"
+            )
+            return True
+
+    def warmup(self) -> dict:
+        """
+        Load the model and push predictions through every serving path
+        (single row, batch, cache lookup, explanations) so the first real request pays no
+        one-off costs. Returns timings in seconds.
+        """
+        started = time.perf_counter()
+        loaded = self.load_model() if self._bundle is None else True
+        load_s = time.perf_counter() - started
+
+        if loaded:
+            sample = {"hours_of_sleep": 7.25, "stress_level": 3, "medication_taken": 1}
+            self.predict(sample)
+            self.predict_batch([sample] * 8)
+            self.lookup(sample)
+            self.explain_batch([sample])
+        # After the warmup traffic, so it stays out of the shadow comparison
+        if not self.shadow.enabled:
+            self.shadow.load()
+        return {
+            "loaded": loaded,
+            "load_s": round(load_s, 3),
+            "warmup_s": round(time.perf_counter() - started, 3),
+        }
+
+    def artifacts_changed(self) -> bool:
+        bundle = self._bundle
+        return bundle is None or bundle.fingerprint != self._refresh_paths().fingerprint()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Hot-reload when any artifact on disk differs from the serving bundle.
+        Changed fine-tuned models are dropped from the registry and reload lazily.
+        """
+        for model_id in self.registry.evict_stale():
+            print(f"🔁 Model '{model_id}' changed on disk; reloading on next use.")
+        self.shadow.reload_if_changed()
+        if not self.artifacts_changed():
+            return False
+        return self.load_model()
+
+    def status(self) -> dict:
+        bundle = self._bundle
+        return {
+            "loaded": bundle is not None,
+            **(bundle.info() if bundle else {}),
+            "registry": self.registry.stats(),
+        }
+
+    def _bundle_for(self, input_data: dict, load: bool = True) -> ModelBundle | None:
+        """
+        Bundle serving this input: its assigned fine-tuned model when one is
+        requested and available, else the foundation model. With load=False
+        only already-resident models are considered (never blocks).
+        """
+        model_id = input_data.get("model_id")
+        if model_id in DEFAULT_MODEL_IDS:
+            return self._bundle
+        if not load:
+            return self.registry.peek(model_id)
+
+        bundle = self.registry.get(model_id)
+        if bundle is None:
+            if self._unknown_models.get(model_id) is None:
+                self._unknown_models.put(model_id, True)
+                print(f"⚠️ Model '{model_id}' unavailable; serving the foundation model.")
+            return self._bundle
+        return bundle
+
+    def _route(self, rows: list[dict]) -> dict[ModelBundle, list[int]]:
+        """Row indices grouped by the bundle that serves them."""
+        groups: dict[ModelBundle, list[int]] = {}
+        # Resolve each model id once per call (no reload thrash within a batch)
+        resolved: dict = {}
+        for i, row in enumerate(rows):
+            model_id = row.get("model_id")
+            bundle = resolved.get(model_id)
+            if bundle is None:
+                bundle = resolved[model_id] = self._bundle_for(row)
+            if bundle is None:
+                raise RuntimeError("Model not loaded. Check server logs.")
+            groups.setdefault(bundle, []).append(i)
+        return groups
+
+    @staticmethod
+    def risk_status(risk_score: float) -> str:
+        """Map a raw probability onto the clinical risk bands."""
+        if risk_score > HIGH_RISK_THRESHOLD:
+            return "High Risk"
+        if risk_score > MEDIUM_RISK_THRESHOLD:
+            return "Medium Risk"
+        return "Low Risk"
+
+    def _format_result(self, risk_score: float, profile_id: str) -> dict:
+        return {
+            "risk_percentage": round(risk_score * 100, 1),
+            "status": self.risk_status(risk_score),
+            "baseline_used": profile_id
+        }
+
+    @staticmethod
+    def _cache_key(profile_id: str, input_data: dict) -> tuple | None:
         try:
-            if not self.model_path.exists():
-                print(f"❌ Model file NOT found at {self.model_path}")
-                return
+            return (profile_id,) + tuple(
+                float(input_data.get(name, input_data.get(fallback, 0)))
+                for name, fallback in _CACHE_KEY_FIELDS
+            )
+        except (TypeError, ValueError):
+            return None
 
-            self.model = xgb.Booster()
-            self.model.load_model(str(self.model_path))
-            print("✅ XGBoost Model loaded successfully!")
-        except Exception as e:
-            print(f"❌ Failed to load model: {e}")
-            self.model = None
+    def _cached_risk(self, bundle: ModelBundle, input_data: dict) -> tuple[str, float | None]:
+        profile_id, _ = bundle.eeg_profile(input_data)
+        risk_score = bundle.risk_table.lookup(profile_id, input_data)
+        if risk_score is None:
+            key = self._cache_key(profile_id, input_data)
+            risk_score = bundle.risk_cache.get(key) if key is not None else None
+        return profile_id, risk_score
+
+    def _lookup(self, bundle: ModelBundle, input_data: dict) -> dict | None:
+        profile_id, risk_score = self._cached_risk(bundle, input_data)
+        if risk_score is None:
+            return None
+        self._shadow(bundle, [input_data], [risk_score])
+        return self._format_result(risk_score, profile_id)
+
+    def _shadow(self, bundle: ModelBundle, rows: list[dict], risks: list[float]) -> None:
+        """Mirror foundation-model traffic to the shadow candidate (non-blocking)."""
+        if self.shadow.enabled and bundle is self._bundle:
+            self.shadow.submit(rows, risks)
+
+    def lookup(self, input_data: dict) -> dict | None:
+        """
+        O(1) answer for an input already known to the risk table (on-grid
+        simulator inputs) or the off-grid LRU; None means it must be scored.
+        Never loads a model, so it is safe to call on the event loop.
+        """
+        bundle = self._bundle_for(input_data, load=False)
+        if bundle is None:
+            return None
+        return self._lookup(bundle, input_data)
+
+    def metric_model_id(self, input_data: dict) -> str:
+        """
+        Metrics label for the model serving this input: a resident bundle's
+        id, else the foundation model's. Never the raw client-supplied id,
+        which would mint one series per value.
+        """
+        bundle = self._bundle_for(input_data, load=False)
+        return bundle.model_id if bundle is not None else FOUNDATION_MODEL_ID
+
+    def _remember(self, bundle: ModelBundle, profile_id: str, input_data: dict, risk_score: float) -> None:
+        key = self._cache_key(profile_id, input_data)
+        if key is not None:
+            bundle.risk_cache.put(key, risk_score)
 
     def predict(self, input_data: dict):
-        if not self.model:
+        bundle = self._bundle_for(input_data)
+        if bundle is None:
             print("⚠️ Attempted prediction with no model loaded.")
             return {"error": "Model not loaded. Check server logs."}
 
+        with inference_stage("lookup", bundle.model_id):
+            cached = self._lookup(bundle, input_data)
+        if cached is not None:
+            return cached
+
         try:
-            # 1. Define Baseline EEG Features (The "Missing Piece")
-            # In a real system, these would come from the live EEG stream.
-            # For the Demo/Simulator, we use standard "resting state" values.
-            baseline_eeg = {
-                "eeg_mean_amp": 0.0,
-                "eeg_std_amp": 15.5,
-                "eeg_skewness": 0.1,
-                "eeg_kurtosis": 3.2,
-                "eeg_peak_to_peak": 50.0,
-                "eeg_delta_power": 0.45,
-                "eeg_theta_power": 0.25,
-                "eeg_alpha_power": 0.15,
-                "eeg_beta_power": 0.15
-            }
-
-            # 2. Combine Lifestyle Inputs with EEG Data
-            features = {
-                # --- Lifestyle Features (From Sliders) ---
-                "hours_of_sleep": float(input_data.get("hours_of_sleep", 0)),
-                "stress_level": int(input_data.get("stress_level", 0)),
-                "medication_taken": int(input_data.get("medication_taken", 0)),
-                
-                # --- Moving Averages (Fallback to current if missing) ---
-                "hours_of_sleep_7day_avg": float(input_data.get("hours_of_sleep_7day_avg", input_data.get("hours_of_sleep", 0))),
-                "stress_level_7day_avg": float(input_data.get("stress_level_7day_avg", input_data.get("stress_level", 0))),
-                "medication_taken_7day_avg": float(input_data.get("medication_taken_7day_avg", input_data.get("medication_taken", 0))),
-
-                # --- EEG Features (The Fix) ---
-                **baseline_eeg 
-            }
-
-            # 3. Convert to DataFrame (Crucial for XGBoost column matching)
-            df = pd.DataFrame([features])
-            
-            # Ensure columns are in the exact order the model expects
-            # (XGBoost is sensitive to column order)
-            model_columns = [
-                'hours_of_sleep', 'stress_level', 'medication_taken',
-                'hours_of_sleep_7day_avg', 'stress_level_7day_avg', 'medication_taken_7day_avg',
-                'eeg_mean_amp', 'eeg_std_amp', 'eeg_skewness', 'eeg_kurtosis', 'eeg_peak_to_peak',
-                'eeg_delta_power', 'eeg_theta_power', 'eeg_alpha_power', 'eeg_beta_power'
-            ]
-            df = df[model_columns]
-
-            # 4. Predict
-            dmatrix = xgb.DMatrix(df)
-            prediction = self.model.predict(dmatrix)
-            risk_score = float(prediction[0])
+            # 1. Lifestyle inputs + EEG profile straight into a preallocated row
+            # (column order comes from model_signature.json; 7-day avgs fall back
+            # to the current value when missing)
+            with inference_stage("assemble", bundle.model_id):
+                profile_id, eeg = bundle.eeg_profile(input_data)
+                row = bundle.assembler.assemble(input_data, eeg)
 
-            # 5. Logic: Thresholding
-            status = "Low Risk"
-            if risk_score > 0.7:
-                status = "High Risk"
-            elif risk_score > 0.4:
-                status = "Medium Risk"
+            # 2. Predict
+            with inference_stage("score", bundle.model_id):
+                prediction = bundle.score(row)
+            risk_score = float(prediction[0])
+            self._remember(bundle, profile_id, input_data, risk_score)
+            self._shadow(bundle, [input_data], [risk_score])
 
-            return {
-                "risk_percentage": round(risk_score * 100, 1),
-                "status": status,
-                "baseline_used": input_data.get("patient_id", "Standard Baseline")
-            }
+            # 3. Logic: Thresholding
+            return self._format_result(risk_score, profile_id)
 
         except Exception as e:
             import traceback
             traceback.print_exc()
             return {"error": f"Prediction Logic Failed: {str(e)}"}
 
+    def predict_batch(self, rows: list[dict], cache: bool = False) -> list[dict]:
+        """
+        Score many feature rows with a single booster call.
+        Rows are packed into one contiguous float32 matrix (no per-row DataFrame)
+        and predicted in a single vectorized pass.
+        With cache=True, rows answered by the risk table / LRU skip the booster
+        and fresh scores are remembered (used by the /ml/predict batcher; cohort
+        batches leave it off so they don't flush the LRU).
+        Raises RuntimeError if no model is loaded.
+        """
+        if self._bundle is None:
+            raise RuntimeError("Model not loaded. Check server logs.")
+        if not rows:
+            return []
+
+        results: list[dict | None] = [None] * len(rows)
+        # One matrix + one booster call per model in the batch
+        for bundle, indices in self._route(rows).items():
+            risks: dict[int, float] = {}
+            pending = indices
+            if cache:
+                pending = []
+                with inference_stage("lookup", bundle.model_id):
+                    for i in indices:
+                        profile_id, risk_score = self._cached_risk(bundle, rows[i])
+                        if risk_score is None:
+                            pending.append(i)
+                        else:
+                            risks[i] = risk_score
+                            results[i] = self._format_result(risk_score, profile_id)
+
+            if pending:
+                with inference_stage("assemble", bundle.model_id):
+                    matrix = np.empty((len(pending), bundle.assembler.n_features), dtype=np.float32)
+                    profile_ids = []
+                    for j, i in enumerate(pending):
+                        profile_id, eeg = bundle.eeg_profile(rows[i])
+                        bundle.assembler.fill(matrix[j], rows[i], eeg)
+                        profile_ids.append(profile_id)
+                with inference_stage("score", bundle.model_id):
+                    scores = bundle.score(matrix)
+
+                for i, profile_id, score in zip(pending, profile_ids, scores):
+                    risk_score = risks[i] = float(score)
+                    if cache:
+                        self._remember(bundle, profile_id, rows[i], risk_score)
+                    results[i] = self._format_result(risk_score, profile_id)
+
+            self._shadow(bundle, [rows[i] for i in indices], [risks[i] for i in indices])
+        return results
+
+    @staticmethod
+    def _format_explanation(feature_order: list[str], contribs: np.ndarray) -> dict:
+        """Bias + per-feature log-odds contributions, largest magnitude first."""
+        order = np.argsort(-np.abs(contribs[:-1]), kind="stable")
+        return {
+            "base_value": round(float(contribs[-1]), 4),
+            "contributions": {feature_order[i]: round(float(contribs[i]), 4) for i in order},
+        }
+
+    def explain_batch(self, rows: list[dict]) -> list[dict]:
+        """
+        Prediction plus "why": per-feature contributions from the booster's
+        native pred_contribs, computed for every uncached row in one call.
+        Contributions are in log-odds and sum (with the base value) to the
+        model margin. Results are memoised per input in the bundle's
+        explanation LRU.
+        Raises RuntimeError if no model is loaded.
+        """
+        if self._bundle is None:
+            raise RuntimeError("Model not loaded. Check server logs.")
+        if not rows:
+            return []
+
+        results: list[dict | None] = [None] * len(rows)
+        for bundle, indices in self._route(rows).items():
+            entries, profile_ids, keys, pending = {}, {}, {}, []
+            for i in indices:
+                profile_id, _ = bundle.eeg_profile(rows[i])
+                profile_ids[i] = profile_id
+                keys[i] = self._cache_key(profile_id, rows[i])
+                entries[i] = bundle.explain_cache.get(keys[i]) if keys[i] is not None else None
+                if entries[i] is None:
+                    pending.append(i)
+
+            if pending:
+                with inference_stage("assemble", bundle.model_id):
+                    matrix = np.empty((len(pending), bundle.assembler.n_features), dtype=np.float32)
+                    for j, i in enumerate(pending):
+                        _, eeg = bundle.eeg_profile(rows[i])
+                        bundle.assembler.fill(matrix[j], rows[i], eeg)
+                with inference_stage("score", bundle.model_id):
+                    scores = bundle.score(matrix)
+                with inference_stage("contributions", bundle.model_id):
+                    contribs = bundle.contributions(matrix)
+
+                for j, i in enumerate(pending):
+                    entries[i] = (float(scores[j]), contribs[j])
+                    if keys[i] is not None:
+                        bundle.explain_cache.put(keys[i], entries[i])
+
+            for i in indices:
+                risk_score, contribs = entries[i]
+                results[i] = {
+                    **self._format_result(risk_score, profile_ids[i]),
+                    "explanation": self._format_explanation(bundle.assembler.feature_order, contribs),
+                }
+        return results
+
+    def explain(self, input_data: dict) -> dict:
+        return self.explain_batch([input_data])[0]
+
+    def risk_surface(
+        self,
+        input_data: dict,
+        sleep_values: list[float],
+        stress_values: list[float],
+        medication_values: list[float],
+    ) -> dict:
+        """
+        What-if surface for one EEG profile: every (medication, stress, sleep)
+        combination is scored in a single vectorized pass over the cartesian
+        product. Grids are indexed [medication][stress][sleep]; current values
+        stand in for the 7-day averages, as in the simulator.
+        Raises RuntimeError if no model is loaded.
+        """
+        bundle = self._bundle_for(input_data)
+        if bundle is None:
+            raise RuntimeError("Model not loaded. Check server logs.")
+
+        meds, stress, sleep = (
+            axis.ravel()
+            for axis in np.meshgrid(
+                np.asarray(medication_values, dtype=np.float64),
+                np.asarray(stress_values, dtype=np.float64),
+                np.asarray(sleep_values, dtype=np.float64),
+                indexing="ij",
+            )
+        )
+        with inference_stage("assemble", bundle.model_id):
+            profile_id, eeg = bundle.eeg_profile(input_data)
+            matrix = bundle.assembler.assemble_columns(
+                sleep.size,
+                {"hours_of_sleep": sleep, "stress_level": stress, "medication_taken": meds},
+                eeg,
+            )
+        with inference_stage("score", bundle.model_id):
+            scores = bundle.score(matrix)
+        scores = scores.reshape(len(medication_values), len(stress_values), len(sleep_values))
+
+        status = np.select(
+            [scores > HIGH_RISK_THRESHOLD, scores > MEDIUM_RISK_THRESHOLD],
+            ["High Risk", "Medium Risk"],
+            default="Low Risk",
+        )
+        return {
+            "risk_percentage": np.round(scores.astype(np.float64) * 100, 1).tolist(),
+            "status": status.tolist(),
+            "baseline_used": profile_id,
+        }
+
+
+async def watch_model_registry(service: MLService, interval_s: float, sync) -> None:
+    """
+    Background loop: pull artifacts from the registry with `sync` and hot-swap
+    the model whenever they changed. Runs until cancelled (app shutdown).
+    """
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await asyncio.to_thread(sync)
+            if await asyncio.to_thread(service.reload_if_changed):
+                print(f"🔁 Hot-reloaded model {service.bundle.version}.")
+        except Exception as e:
+            print(f"⚠️ Model registry poll failed: {e}")
+
+
+class BatcherOverloaded(RuntimeError):
+    """The micro-batcher queue is full; the caller should retry later (503)."""
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one booster call.
+
+    Requests are queued on the event loop; a single worker task collects them
+    until `max_batch_size` is reached or `max_wait_ms` has passed since the
+    first one arrived, scores the lot with `MLService.predict_batch` in a
+    worker thread and resolves each caller's future.
+
+    The window is adaptive: when traffic is idle (nothing else queued and the
+    previous batch held a single request) a lone request is dispatched
+    immediately instead of waiting out the window.
+
+    At most `max_queue_size` requests wait; beyond that `submit` raises
+    BatcherOverloaded instead of queueing without bound. When scoring a batch
+    fails, its rows are rescored one by one so only the bad row's caller
+    sees the error.
+    """
+
+    # Upper bounds of the batch-size histogram buckets exposed in stats()
+    SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+    def __init__(
+        self,
+        service: "MLService",
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        max_queue_size: int = 1024,
+    ):
+        self.service = service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue_size = max(1, max_queue_size)
+
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._last_batch_size = 0
+
+        # Stats
+        self._requests = 0
+        self._batches = 0
+        self._largest_batch = 0
+        self._queue_wait_total = 0.0
+        self._rejected = 0
+        self._batch_failures = 0
+        self._size_counts = [0] * (len(self.SIZE_BUCKETS) + 1)
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, input_data: dict) -> dict:
+        """Queue one prediction and wait for its batched result."""
+        # Risk-table / LRU hits never need the booster
+        cached = self.service.lookup(input_data)
+        if cached is not None:
+            return cached
+
+        self._ensure_started()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((input_data, future, time.perf_counter(), current_scope.get()))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise BatcherOverloaded(f"Prediction queue full ({self.max_queue_size} waiting)")
+        return await future
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+
+            # Only hold the batch open when there is concurrent traffic to gather
+            busy = not queue.empty() or self._last_batch_size > 1
+            deadline = self._loop.time() + (self.max_wait if busy else 0.0)
+
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: list) -> None:
+        # Callers that went away (client disconnect) don't need scoring
+        live = [item for item in batch if not item[1].done()]
+        self._record(len(batch), batch)
+        if not live:
+            return
+
+        # Stage metrics inside predict_batch carry the route of the batch's first caller
+        token = current_scope.set(live[0][3])
+        inputs = [item[0] for item in live]
+        try:
+            results = await asyncio.to_thread(self.service.predict_batch, inputs, cache=True)
+        except Exception as e:
+            if len(live) == 1:
+                results = [e]
+            else:
+                # One bad row must not fail its batch-mates
+                self._batch_failures += 1
+                results = await asyncio.to_thread(self._score_each, inputs)
+        finally:
+            current_scope.reset(token)
+
+        for (_, future, _, _), result in zip(live, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _score_each(self, inputs: list[dict]) -> list:
+        """Per-row fallback for a failed batch: each row's result, or the exception it raised."""
+        outcomes = []
+        for input_data in inputs:
+            try:
+                outcomes.append(self.service.predict_batch([input_data], cache=True)[0])
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    def _record(self, size: int, batch: list) -> None:
+        now = time.perf_counter()
+        self._last_batch_size = size
+        self._requests += size
+        self._batches += 1
+        self._largest_batch = max(self._largest_batch, size)
+        for input_data, _, enqueued, scope in batch:
+            wait = now - enqueued
+            self._queue_wait_total += wait
+            INFERENCE_STAGE_SECONDS.observe(
+                wait, "queue_wait", route_label(scope), self.service.metric_model_id(input_data)
+            )
+        for i, bound in enumerate(self.SIZE_BUCKETS):
+            if size <= bound:
+                self._size_counts[i] += 1
+                break
+        else:
+            self._size_counts[-1] += 1
+
+    def stats(self) -> dict:
+        """Queue depth and batch-size figures for tuning the window/size knobs."""
+        labels = [f"<={bound}" for bound in self.SIZE_BUCKETS] + [f">{self.SIZE_BUCKETS[-1]}"]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "rejected": self._rejected,
+            "batch_failures": self._batch_failures,
+            "requests": self._requests,
+            "batches": self._batches,
+            "mean_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+            "largest_batch": self._largest_batch,
+            "mean_queue_wait_ms": (
+                round(self._queue_wait_total / self._requests * 1000.0, 3) if self._requests else 0.0
+            ),
+            "batch_size_histogram": dict(zip(labels, self._size_counts)),
+        }
+
 # ---------------------------------------------------------
 # CRITICAL: This line creates the 'predictor' variable
 # that router.py is trying to import.
 # ---------------------------------------------------------
-predictor = MLService()
\ No newline at end of file
+predictor = MLService(
+    engine=settings.ml_inference_engine,
+    cache_size=settings.ml_risk_cache_size,
+    explain_cache_size=settings.ml_explain_cache_size,
+    models_dir=settings.ml_models_dir,
+    memory_budget_mb=settings.ml_model_memory_budget_mb,
+    shadow_dir=settings.ml_shadow_model_dir,
+    shadow_queue_size=settings.ml_shadow_queue_size,
+)
+batcher = MicroBatcher(
+    predictor,
+    max_batch_size=settings.ml_batch_max_size,
+    max_wait_ms=settings.ml_batch_window_ms,
+    max_queue_size=settings.ml_batch_queue_size,
+)
@@ -0,0 +1,234 @@
+import hashlib
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+
+from app.services.eeg_store import EEGProfiles, file_fingerprint, load_profiles
+from app.services.feature_assembler import FeatureAssembler
+from app.services.risk_table import RiskTable
+from app.services.tree_engine import CompiledForest
+from app.utils.cache import LRUCache
+
+if TYPE_CHECKING:
+    import xgboost as xgb
+
+# Baseline EEG Features (The "Missing Piece")
+# Used when the requested EEG profile is not in master_eeg_features.csv.
+# In a real system, these would come from the live EEG stream.
+BASELINE_EEG = {
+    "eeg_mean_amp": 0.0,
+    "eeg_std_amp": 15.5,
+    "eeg_skewness": 0.1,
+    "eeg_kurtosis": 3.2,
+    "eeg_peak_to_peak": 50.0,
+    "eeg_delta_power": 0.45,
+    "eeg_theta_power": 0.25,
+    "eeg_alpha_power": 0.15,
+    "eeg_beta_power": 0.15
+}
+BASELINE_PROFILE_ID = "Standard Baseline"
+FOUNDATION_MODEL_ID = "foundation"
+
+INFERENCE_ENGINES = ("xgboost", "compiled")
+
+# The compiled forest wins on tiny inputs (no DMatrix/threadpool setup) but
+# xgboost's multithreaded predictor is faster beyond a handful of rows.
+COMPILED_MAX_ROWS = 4
+
+
+class ArtifactPaths(NamedTuple):
+    model: Path
+    signature: Path
+    eeg: Path
+
+    def fingerprint(self) -> tuple:
+        """(mtime, size) of every artifact; None for a missing file."""
+        return tuple(file_fingerprint(path) if path.exists() else None for path in self)
+
+
+class ModelBundle:
+    """
+    One fully loaded model generation: booster, signature-derived assembler,
+    optional compiled forest, EEG profile table, precomputed risk table and
+    the off-grid risk / explanation LRUs.
+
+    A bundle is never mutated after `load()` returns. MLService swaps whole
+    bundles, so a request that picked up a bundle finishes on it even if a
+    newer one is swapped in meanwhile.
+    """
+
+    def __init__(
+        self,
+        model: "xgb.Booster",
+        assembler: FeatureAssembler,
+        forest: CompiledForest | None,
+        eeg_profiles: EEGProfiles | None,
+        risk_table: RiskTable,
+        risk_cache: LRUCache,
+        explain_cache: LRUCache,
+        version: str,
+        fingerprint: tuple,
+        model_size: int = 0,
+        model_id: str = FOUNDATION_MODEL_ID,
+    ):
+        self.model = model
+        self.assembler = assembler
+        self.forest = forest
+        self.eeg_profiles = eeg_profiles
+        self.risk_table = risk_table
+        self.risk_cache = risk_cache
+        self.explain_cache = explain_cache
+        self.version = version
+        self.fingerprint = fingerprint
+        self.model_size = model_size
+        self.model_id = model_id
+        self.loaded_at = time.time()
+
+    @classmethod
+    def load(
+        cls,
+        paths: ArtifactPaths,
+        engine: str = "xgboost",
+        cache_size: int = 4096,
+        explain_cache_size: int = 1024,
+        model_id: str = FOUNDATION_MODEL_ID,
+    ) -> "ModelBundle":
+        """Build a bundle from disk. Raises on any inconsistency; never returns half a model."""
+        if engine not in INFERENCE_ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}', expected one of {INFERENCE_ENGINES}")
+        if not paths.model.exists():
+            raise FileNotFoundError(f"Model file NOT found at {paths.model}")
+
+        # Heavy import deferred to the first load (keeps `import app.main` fast)
+        import xgboost as xgb
+
+        fingerprint = paths.fingerprint()
+        raw = paths.model.read_bytes()
+        model = xgb.Booster()
+        model.load_model(bytearray(raw))
+
+        # Fail fast: never serve a booster whose columns disagree with the signature
+        assembler = FeatureAssembler.from_signature(paths.signature)
+        assembler.check_booster(model)
+
+        forest = cls._compile(model, assembler) if engine == "compiled" else None
+
+        eeg_profiles = None
+        if paths.eeg.exists():
+            eeg_profiles = load_profiles(paths.eeg)
+        else:
+            print(f"⚠️ No EEG profiles at {paths.eeg}; using the standard baseline.")
+
+        profiles = {BASELINE_PROFILE_ID: BASELINE_EEG, **(eeg_profiles.as_dict() if eeg_profiles else {})}
+        # Simulator grid scored up front
+        risk_table = RiskTable.build(assembler, profiles, model.inplace_predict)
+
+        return cls(
+            model=model,
+            assembler=assembler,
+            forest=forest,
+            eeg_profiles=eeg_profiles,
+            risk_table=risk_table,
+            risk_cache=LRUCache(maxsize=cache_size),
+            explain_cache=LRUCache(maxsize=explain_cache_size),
+            version=hashlib.sha256(raw).hexdigest()[:12],
+            fingerprint=fingerprint,
+            model_size=len(raw),
+            model_id=model_id,
+        )
+
+    @staticmethod
+    def _compile(model: "xgb.Booster", assembler: FeatureAssembler) -> CompiledForest | None:
+        """
+        Export the booster to NumPy tree arrays and check it reproduces
+        Booster.predict; on any mismatch fall back to the stock xgboost path.
+        """
+        try:
+            forest = CompiledForest.from_booster(model)
+            probe = assembler.assemble_batch(
+                [
+                    {"hours_of_sleep": sleep, "stress_level": stress, "medication_taken": meds}
+                    for sleep in (0.0, 4.5, 8.0, 12.0)
+                    for stress in (0, 3, 5, 10)
+                    for meds in (0, 1)
+                ],
+                BASELINE_EEG,
+            )
+            drift = float(np.max(np.abs(forest.predict(probe) - model.inplace_predict(probe))))
+            if drift > 1e-4:
+                raise ValueError(f"compiled forest drifts from Booster.predict by {drift:.2e}")
+            print(f"⚡ Compiled {forest.n_trees} trees (depth {forest.depth}) for NumPy inference.")
+            return forest
+        except Exception as e:
+            print(f"⚠️ Compiled engine unavailable, using xgboost: {e}")
+            return None
+
+    def score(self, matrix: np.ndarray) -> np.ndarray:
+        """Probabilities for an assembled (n_rows, n_features) float32 matrix."""
+        if self.forest is not None and matrix.shape[0] <= COMPILED_MAX_ROWS:
+            return self.forest.predict(matrix)
+        # inplace_predict skips DMatrix construction
+        return self.model.inplace_predict(matrix)
+
+    def contributions(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Per-feature contributions (log-odds) for an assembled matrix, from the
+        booster's native TreeSHAP (`pred_contribs`) in one call. Returns
+        (n_rows, n_features + 1); the last column is the bias (base value).
+        """
+        import xgboost as xgb
+
+        dmatrix = xgb.DMatrix(
+            matrix,
+            feature_names=self.assembler.feature_order if self.model.feature_names else None,
+        )
+        return self.model.predict(dmatrix, pred_contribs=True)
+
+    def eeg_profile(self, input_data: dict) -> tuple[str, dict]:
+        """
+        EEG profile id and feature values used for this input: the requested
+        eeg_profile_id (exact or subject prefix, e.g. "chb01") from the profile
+        table, else the standard baseline.
+        """
+        if self.eeg_profiles is not None:
+            requested = input_data.get("eeg_profile_id", input_data.get("patient_id"))
+            resolved = self.eeg_profiles.resolve(requested)
+            if resolved is not None:
+                return resolved, self.eeg_profiles.features(resolved)
+        return BASELINE_PROFILE_ID, BASELINE_EEG
+
+    def warm(self) -> float:
+        """Run one prediction through every path a request can take; returns the risk."""
+        row = self.assembler.assemble({"hours_of_sleep": 7.0, "stress_level": 3, "medication_taken": 1}, BASELINE_EEG)
+        risk = float(self.score(row)[0])
+        self.model.inplace_predict(np.repeat(row, COMPILED_MAX_ROWS + 1, axis=0))
+        if not 0.0 <= risk <= 1.0:
+            raise ValueError(f"Warmup prediction out of range: {risk}")
+        return risk
+
+    def memory_bytes(self) -> int:
+        """
+        Estimated resident footprint: serialized booster size plus the NumPy
+        arrays built from it. Cache entries are bounded by their own LRUs.
+        """
+        total = self.model_size + self.risk_table.risks.nbytes
+        if self.forest is not None:
+            total += self.forest.nbytes
+        if self.eeg_profiles is not None:
+            total += self.eeg_profiles.values.nbytes
+        return total
+
+    def info(self) -> dict:
+        return {
+            "model_id": self.model_id,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "engine": "compiled" if self.forest is not None else "xgboost",
+            "eeg_profiles": len(self.eeg_profiles) if self.eeg_profiles else 0,
+            "precomputed_risks": self.risk_table.size,
+            "memory_bytes": self.memory_bytes(),
+            "risk_cache": self.risk_cache.stats(),
+            "explain_cache": self.explain_cache.stats(),
+        }
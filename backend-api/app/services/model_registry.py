@@ -0,0 +1,172 @@
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from app.services.model_bundle import ArtifactPaths, ModelBundle
+
+# Model ids double as directory names under the registry root
+_MODEL_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+
+class ModelRegistry:
+    """
+    Fine-tuned models (patients.assigned_model_id), loaded lazily by id.
+
+    Each model lives in `<root>/<model_id>/` with the same artifact names as
+    the foundation model; the EEG profile table is shared. Loaded bundles stay
+    resident while their estimated footprint fits `memory_budget_bytes`; the
+    least recently used ones are evicted first. A bundle in use by a request
+    keeps working after eviction (it is only dropped from the registry).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        model_file: str,
+        signature_file: str,
+        eeg_path: Path,
+        memory_budget_bytes: int,
+        engine: str = "xgboost",
+        cache_size: int = 4096,
+        explain_cache_size: int = 1024,
+    ):
+        self.root = Path(root)
+        self.model_file = model_file
+        self.signature_file = signature_file
+        self.eeg_path = eeg_path
+        self.memory_budget_bytes = memory_budget_bytes
+        self.engine = engine
+        self.cache_size = cache_size
+        self.explain_cache_size = explain_cache_size
+
+        self._resident: OrderedDict[str, ModelBundle] = OrderedDict()
+        self._lock = threading.Lock()
+        # model_id -> [loader lock, callers holding or waiting on it], only while
+        # a load is in flight; different ids load in parallel
+        self._loading: dict[str, list] = {}
+        # model_id -> artifact fingerprint that failed to load (not retried until it changes)
+        self._failed: dict[str, tuple] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def paths(self, model_id: str) -> ArtifactPaths:
+        model_dir = self.root / model_id
+        return ArtifactPaths(
+            model=model_dir / self.model_file,
+            signature=model_dir / self.signature_file,
+            eeg=self.eeg_path,
+        )
+
+    def available(self) -> list[str]:
+        """Model ids with a model file on disk."""
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            entry.name for entry in self.root.iterdir()
+            if _MODEL_ID_PATTERN.match(entry.name) and (entry / self.model_file).exists()
+        )
+
+    def peek(self, model_id: str) -> ModelBundle | None:
+        """Resident bundle for `model_id`, without loading (safe on the event loop)."""
+        with self._lock:
+            bundle = self._resident.get(model_id)
+            if bundle is not None:
+                self._resident.move_to_end(model_id)
+            return bundle
+
+    def get(self, model_id: str) -> ModelBundle | None:
+        """
+        Bundle for `model_id`, loading it on first use. Returns None when the
+        id is unknown or its artifacts fail to load (callers fall back to the
+        foundation model).
+        """
+        bundle = self.peek(model_id)
+        if bundle is not None:
+            return bundle
+        if not _MODEL_ID_PATTERN.match(model_id):
+            return None
+
+        paths = self.paths(model_id)
+        if not paths.model.exists():
+            # Checked before taking a loader, so unknown ids leave nothing behind
+            return None
+
+        with self._lock:
+            loader = self._loading.setdefault(model_id, [threading.Lock(), 0])
+            loader[1] += 1
+        try:
+            with loader[0]:
+                # Another request may have loaded it while we waited
+                return self.peek(model_id) or self._load(model_id, paths)
+        finally:
+            with self._lock:
+                loader[1] -= 1
+                if not loader[1]:
+                    del self._loading[model_id]
+
+    def _load(self, model_id: str, paths: ArtifactPaths) -> ModelBundle | None:
+        """Load, warm and register one model (caller holds its loader lock)."""
+        fingerprint = paths.fingerprint()
+        if self._failed.get(model_id) == fingerprint:
+            return None
+
+        try:
+            bundle = ModelBundle.load(
+                paths,
+                engine=self.engine,
+                cache_size=self.cache_size,
+                explain_cache_size=self.explain_cache_size,
+                model_id=model_id,
+            )
+            bundle.warm()
+        except Exception as e:
+            print(f"❌ Failed to load model '{model_id}': {e}")
+            self._failed[model_id] = fingerprint
+            return None
+
+        self._failed.pop(model_id, None)
+        with self._lock:
+            self._resident[model_id] = bundle
+            self.loads += 1
+            self._evict_over_budget(keep=model_id)
+        print(f"✅ Model '{model_id}' ({bundle.version}) loaded, {bundle.memory_bytes() / 2**20:.1f} MiB.")
+        return bundle
+
+    def _evict_over_budget(self, keep: str) -> None:
+        """Drop least recently used bundles until the budget fits (caller holds the lock)."""
+        total = sum(bundle.memory_bytes() for bundle in self._resident.values())
+        for model_id in list(self._resident):
+            if total <= self.memory_budget_bytes:
+                break
+            if model_id == keep:
+                continue
+            total -= self._resident.pop(model_id).memory_bytes()
+            self.evictions += 1
+            print(f"♻️ Evicted model '{model_id}' (memory budget).")
+
+    def evict_stale(self) -> list[str]:
+        """Drop resident bundles whose artifacts changed on disk; they reload on next use."""
+        with self._lock:
+            stale = [
+                model_id for model_id, bundle in self._resident.items()
+                if bundle.fingerprint != self.paths(model_id).fingerprint()
+            ]
+            for model_id in stale:
+                del self._resident[model_id]
+        return stale
+
+    def stats(self) -> dict:
+        with self._lock:
+            resident = {
+                model_id: {"version": bundle.version, "memory_bytes": bundle.memory_bytes()}
+                for model_id, bundle in self._resident.items()
+            }
+        return {
+            "root": str(self.root),
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "memory_bytes": sum(entry["memory_bytes"] for entry in resident.values()),
+            "resident": resident,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
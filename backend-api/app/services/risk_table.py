@@ -0,0 +1,99 @@
+import math
+from typing import Callable, Mapping
+
+import numpy as np
+
+from app.services.feature_assembler import FeatureAssembler
+
+# Simulator input grid: sleep in 0.1 h steps, integer stress, binary meds
+SLEEP_MAX = 12.0
+SLEEP_STEPS_PER_HOUR = 10
+STRESS_MAX = 10
+MEDICATION_VALUES = (0, 1)
+
+_GRID_TOLERANCE = 1e-6
+
+
+class RiskTable:
+    """
+    Precomputed risk for every point of the simulator grid, per EEG profile.
+
+    The simulator sends current values only (the 7-day averages equal the
+    current values), so the whole input space is
+    profiles x sleep (0..12 h, 0.1 h steps) x stress (0..10) x meds (0/1),
+    small enough to score in one booster call when a model loads. Lookups
+    are then plain array indexing.
+    """
+
+    def __init__(self, profile_ids: list[str], risks: np.ndarray):
+        self.profile_index = {profile_id: i for i, profile_id in enumerate(profile_ids)}
+        self.risks = risks  # (profiles, sleep, stress, meds) float32
+
+    @classmethod
+    def build(
+        cls,
+        assembler: FeatureAssembler,
+        profiles: Mapping[str, Mapping],
+        score: Callable[[np.ndarray], np.ndarray],
+    ) -> "RiskTable":
+        """
+        Score the full grid for each profile. `profiles` maps a profile id to
+        its EEG feature values; `score` maps an assembled matrix to probabilities.
+        """
+        sleep = np.arange(SLEEP_MAX * SLEEP_STEPS_PER_HOUR + 1) / SLEEP_STEPS_PER_HOUR
+        stress = np.arange(STRESS_MAX + 1, dtype=np.float64)
+        meds = np.asarray(MEDICATION_VALUES, dtype=np.float64)
+        shape = (len(sleep), len(stress), len(meds))
+
+        # Cartesian product in (sleep, stress, meds) C-order, shared by all profiles
+        grid_sleep, grid_stress, grid_meds = (
+            axis.ravel() for axis in np.meshgrid(sleep, stress, meds, indexing="ij")
+        )
+        n_cells = grid_sleep.size
+
+        profile_ids = list(profiles)
+        matrix = np.concatenate([
+            assembler.assemble_columns(
+                n_cells,
+                {"hours_of_sleep": grid_sleep, "stress_level": grid_stress, "medication_taken": grid_meds},
+                profiles[profile_id],
+            )
+            for profile_id in profile_ids
+        ])
+
+        risks = np.asarray(score(matrix), dtype=np.float32).reshape((len(profile_ids),) + shape)
+        return cls(profile_ids, risks)
+
+    @property
+    def size(self) -> int:
+        return int(self.risks.size)
+
+    def lookup(self, profile_id: str, input_data: Mapping) -> float | None:
+        """Risk for an on-grid simulator input, or None if it is off the grid."""
+        p = self.profile_index.get(profile_id)
+        if p is None:
+            return None
+        try:
+            sleep = float(input_data["hours_of_sleep"])
+            stress = float(input_data["stress_level"])
+            meds = float(input_data["medication_taken"])
+            # Only simulator-shaped inputs: rolling averages absent or equal to current values
+            for base, value in (("hours_of_sleep", sleep), ("stress_level", stress), ("medication_taken", meds)):
+                avg = input_data.get(f"{base}_7day_avg")
+                if avg is not None and abs(float(avg) - value) > _GRID_TOLERANCE:
+                    return None
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not (math.isfinite(sleep) and math.isfinite(stress)):
+            # NaN / Infinity are never on the grid; the booster scores them
+            return None
+
+        s = round(sleep * SLEEP_STEPS_PER_HOUR)
+        t = round(stress)
+        if abs(sleep * SLEEP_STEPS_PER_HOUR - s) > _GRID_TOLERANCE or abs(stress - t) > _GRID_TOLERANCE:
+            return None
+        if meds not in MEDICATION_VALUES:
+            return None
+        if not (0 <= s < self.risks.shape[1] and 0 <= t < self.risks.shape[2]):
+            return None
+        return float(self.risks[p, s, t, MEDICATION_VALUES.index(int(meds))])
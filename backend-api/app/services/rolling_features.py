@@ -0,0 +1,106 @@
+"""Per-patient rolling 7-day log aggregates, kept current as logs are written."""
+import datetime as dt
+from typing import Mapping
+
+from supabase import AsyncClient
+
+from app.config import settings
+from app.services.log_features import LOG_FEATURES, window_start
+from app.utils.cache import TTLCache
+from app.utils.metrics import supabase_call
+
+WINDOW_COLUMNS = ", ".join(("date", "created_at") + LOG_FEATURES)
+
+
+def _as_date(value) -> dt.date:
+    if isinstance(value, dt.date):
+        return value
+    return dt.date.fromisoformat(str(value)[:10])
+
+
+class RollingWindow:
+    """
+    One patient's logged values for the days of the current window, one entry
+    per day: a later log for a day replaces the earlier one, and logs dated
+    before the window are ignored. It never holds more than a window's worth
+    of days, so adding a log and reading the features are both O(1).
+    """
+
+    def __init__(self):
+        self.days: dict[dt.date, tuple[float, ...]] = {}
+
+    def add(self, day: dt.date, log: Mapping) -> None:
+        start = window_start()
+        if day < start:
+            # Back-dated past the window: cannot affect current features
+            return
+        self.days[day] = tuple(float(log.get(name) or 0.0) for name in LOG_FEATURES)
+        for expired in [d for d in self.days if d < start]:
+            del self.days[expired]
+
+    def features(self, today: dt.date | None = None) -> dict | None:
+        """
+        The latest day's values, the window averages (`<feature>_7day_avg`)
+        and that day under "last_log_date"; None without logs in the window.
+        """
+        start = window_start(today)
+        days = sorted(d for d in self.days if d >= start)
+        if not days:
+            return None
+        latest = self.days[days[-1]]
+        row = {"last_log_date": days[-1]}
+        for j, name in enumerate(LOG_FEATURES):
+            row[name] = latest[j]
+            row[f"{name}_7day_avg"] = sum(self.days[d][j] for d in days) / len(days)
+        return row
+
+
+class RollingFeatureStore:
+    """
+    RollingWindows by patient_id. A window is loaded once with a query bounded
+    to the window's dates, then updated in place by `record()` whenever this
+    process writes a log. Entries expire after `ttl_s` so logs written by other
+    workers are picked up.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl_s: float = 600.0):
+        self._windows = TTLCache(maxsize=maxsize, ttl_s=ttl_s)
+
+    def record(self, patient_id: str, log: Mapping) -> None:
+        """Fold a freshly inserted patient_logs row into the patient's window, if resident."""
+        window = self._windows.get(patient_id)
+        if window is not None:
+            window.add(_as_date(log["date"]), log)
+
+    async def window(self, admin: AsyncClient, patient_id: str) -> RollingWindow:
+        window = self._windows.get(patient_id)
+        if window is None:
+            window = await self._load(admin, patient_id)
+            self._windows.put(patient_id, window)
+        return window
+
+    async def features(self, admin: AsyncClient, patient_id: str) -> dict | None:
+        return (await self.window(admin, patient_id)).features()
+
+    @staticmethod
+    async def _load(admin: AsyncClient, patient_id: str) -> RollingWindow:
+        with supabase_call("patient_logs", "select"):
+            resp = await (
+                admin.table("patient_logs")
+                .select(WINDOW_COLUMNS)
+                .eq("patient_id", patient_id)
+                .gte("date", window_start().isoformat())
+                # Replayed in write order, so the last log of a day wins
+                .order("created_at")
+                .execute()
+            )
+        window = RollingWindow()
+        for row in resp.data or []:
+            window.add(_as_date(row["date"]), row)
+        return window
+
+    def stats(self) -> dict:
+        return self._windows.stats()
+
+
+rolling_store = RollingFeatureStore(maxsize=settings.rolling_store_size, ttl_s=settings.rolling_store_ttl_s)
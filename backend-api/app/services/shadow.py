@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+
+from app.services.model_bundle import ArtifactPaths, ModelBundle
+
+# Upper bounds of the |shadow - primary| histogram buckets (probability points)
+DELTA_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5)
+# Rows scored per candidate booster call
+MAX_SHADOW_BATCH = 512
+
+
+class ShadowEvaluator:
+    """
+    Scores live traffic with a candidate model, off the request path.
+
+    The serving path hands over (inputs, primary risks) with a non-blocking
+    put on a bounded queue; when the queue is full the work is dropped and
+    counted, never waited on. A single daemon thread drains the queue,
+    scores the inputs with the candidate bundle in batches and aggregates
+    band agreement and risk deltas for /ml/admin/shadow.
+    """
+
+    def __init__(
+        self,
+        paths: ArtifactPaths,
+        risk_status: Callable[[float], str],
+        queue_size: int = 256,
+        engine: str = "xgboost",
+    ):
+        self.paths = paths
+        self.risk_status = risk_status
+        self.engine = engine
+        self.bundle: ModelBundle | None = None
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._worker: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return self.bundle is not None
+
+    def load(self) -> bool:
+        """Load + warm the candidate; on failure shadowing stays off (or on the old candidate)."""
+        if not self.paths.model.exists():
+            if self.bundle is not None:
+                print("👥 Shadow model removed; shadow evaluation off.")
+                self.bundle = None
+            return False
+        try:
+            candidate = ModelBundle.load(
+                self.paths, engine=self.engine, cache_size=1, explain_cache_size=1, model_id="shadow"
+            )
+            candidate.warm()
+        except Exception as e:
+            print(f"❌ Failed to load shadow model: {e}")
+            return False
+        self.bundle = candidate
+        self.reset()
+        print(f"👥 Shadow model {candidate.version} evaluating live traffic.")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        bundle = self.bundle
+        if bundle is not None and bundle.fingerprint == self.paths.fingerprint():
+            return False
+        return self.load()
+
+    def reset(self) -> None:
+        with self._stats_lock:
+            self._compared = 0
+            self._dropped = 0
+            self._errors = 0
+            self._agreed = 0
+            self._delta_sum = 0.0
+            self._abs_delta_sum = 0.0
+            self._max_abs_delta = 0.0
+            self._delta_counts = [0] * (len(DELTA_BUCKETS) + 1)
+            # primary band -> shadow band -> count
+            self._bands: dict[str, dict[str, int]] = {}
+            self._busy_s = 0.0
+
+    def submit(self, rows: list[dict], primary_risks: list[float]) -> None:
+        """Hand a scored batch to the shadow worker. Never blocks."""
+        if self.bundle is None or not rows:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((rows, primary_risks))
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += len(rows)
+
+    def _ensure_started(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="shadow-eval", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            n_rows = len(items[0][0])
+            # Drain what is already queued into one candidate call
+            while n_rows < MAX_SHADOW_BATCH:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+                n_rows += len(item[0])
+
+            bundle = self.bundle
+            if bundle is None:
+                continue
+            started = time.perf_counter()
+            try:
+                rows = [row for item in items for row in item[0]]
+                primary = np.asarray([risk for item in items for risk in item[1]], dtype=np.float64)
+                matrix = np.empty((len(rows), bundle.assembler.n_features), dtype=np.float32)
+                for i, row in enumerate(rows):
+                    _, eeg = bundle.eeg_profile(row)
+                    bundle.assembler.fill(matrix[i], row, eeg)
+                shadow = bundle.score(matrix).astype(np.float64)
+            except Exception as e:
+                with self._stats_lock:
+                    self._errors += n_rows
+                print(f"⚠️ Shadow scoring failed: {e}")
+                continue
+            self._record(primary, shadow, time.perf_counter() - started)
+
+    def _record(self, primary: np.ndarray, shadow: np.ndarray, elapsed: float) -> None:
+        delta = shadow - primary
+        abs_delta = np.abs(delta)
+        bucket_counts = np.bincount(
+            np.searchsorted(DELTA_BUCKETS, abs_delta, side="left"), minlength=len(DELTA_BUCKETS) + 1
+        )
+        primary_bands = [self.risk_status(float(risk)) for risk in primary]
+        shadow_bands = [self.risk_status(float(risk)) for risk in shadow]
+
+        with self._stats_lock:
+            self._compared += len(primary)
+            self._delta_sum += float(delta.sum())
+            self._abs_delta_sum += float(abs_delta.sum())
+            self._max_abs_delta = max(self._max_abs_delta, float(abs_delta.max()))
+            for i, count in enumerate(bucket_counts):
+                self._delta_counts[i] += int(count)
+            for p_band, s_band in zip(primary_bands, shadow_bands):
+                self._agreed += p_band == s_band
+                row = self._bands.setdefault(p_band, {})
+                row[s_band] = row.get(s_band, 0) + 1
+            self._busy_s += elapsed
+
+    def stats(self) -> dict:
+        bundle = self.bundle
+        labels = [f"<={bound}" for bound in DELTA_BUCKETS] + [f">{DELTA_BUCKETS[-1]}"]
+        with self._stats_lock:
+            compared = self._compared
+            return {
+                "enabled": bundle is not None,
+                "candidate_version": bundle.version if bundle else None,
+                "queue_depth": self._queue.qsize(),
+                "compared": compared,
+                "dropped": self._dropped,
+                "errors": self._errors,
+                "band_agreement": round(self._agreed / compared, 4) if compared else None,
+                "mean_delta": round(self._delta_sum / compared, 6) if compared else None,
+                "mean_abs_delta": round(self._abs_delta_sum / compared, 6) if compared else None,
+                "max_abs_delta": round(self._max_abs_delta, 6),
+                "abs_delta_histogram": dict(zip(labels, self._delta_counts)),
+                "band_confusion": {band: dict(row) for band, row in self._bands.items()},
+                "worker_busy_s": round(self._busy_s, 3),
+            }
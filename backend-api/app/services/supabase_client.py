@@ -0,0 +1,56 @@
+"""Async Supabase client shared by the request-path services."""
+from typing import Optional
+
+import httpx
+from supabase import AsyncClient, acreate_client
+from supabase.lib.client_options import AsyncClientOptions
+
+from app.config import settings
+
+_async_admin_client: Optional[AsyncClient] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+async def init_async_admin_client() -> AsyncClient:
+    """
+    Create the service-role AsyncClient once (app lifespan). PostgREST, auth
+    and storage calls all go through one pooled httpx.AsyncClient, so
+    connections are kept alive and reused across requests.
+    """
+    global _async_admin_client, _http_client
+    if _async_admin_client is not None:
+        return _async_admin_client
+
+    _http_client = httpx.AsyncClient(
+        timeout=settings.supabase_timeout_s,
+        limits=httpx.Limits(
+            max_connections=settings.supabase_pool_max_connections,
+            max_keepalive_connections=settings.supabase_pool_max_keepalive,
+        ),
+    )
+    _async_admin_client = await acreate_client(
+        settings.supabase_url,
+        settings.supabase_service_role_key,
+        options=AsyncClientOptions(
+            httpx_client=_http_client,
+            # Service-role client: no user session to persist or refresh
+            auto_refresh_token=False,
+            persist_session=False,
+        ),
+    )
+    return _async_admin_client
+
+
+async def close_async_admin_client() -> None:
+    global _async_admin_client, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _async_admin_client = None
+    _http_client = None
+
+
+def get_async_admin_client() -> AsyncClient:
+    """Service role AsyncClient (bypasses RLS; use only in backend)."""
+    if _async_admin_client is None:
+        raise RuntimeError("Async Supabase client not initialised; it is created in the app lifespan")
+    return _async_admin_client
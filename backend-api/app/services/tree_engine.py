@@ -0,0 +1,183 @@
+import json
+
+import numpy as np
+
+# Objectives whose raw margin is turned into a probability with a sigmoid
+_LOGISTIC_OBJECTIVES = {"binary:logistic", "reg:logistic"}
+# Objectives whose prediction is the raw margin
+_IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "binary:logitraw"}
+
+
+class CompiledForest:
+    """
+    A gradient-boosted forest flattened into NumPy arrays.
+
+    Every tree is padded to the same node count and stored row-wise in
+    (n_trees * max_nodes) arrays: split feature, threshold, left/right child,
+    default direction for missing values and leaf value. Leaves point to
+    themselves, so all trees can be walked in lock-step for `depth` steps with
+    pure vectorized gathers - no DMatrix, no per-call setup.
+
+    Only numerical splits of single-target gbtree models are supported;
+    anything else raises ValueError from `from_booster`.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        default_left: np.ndarray,
+        leaf_value: np.ndarray,
+        n_trees: int,
+        max_nodes: int,
+        depth: int,
+        base_margin: float,
+        logistic: bool,
+        n_features: int,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.leaf_value = leaf_value
+        self.n_trees = n_trees
+        self.max_nodes = max_nodes
+        self.depth = depth
+        self.base_margin = np.float32(base_margin)
+        self.logistic = logistic
+        self.n_features = n_features
+        # Offset of each tree's first node in the flat arrays
+        self._tree_offsets = (np.arange(n_trees, dtype=np.int32) * max_nodes)[None, :]
+
+    @classmethod
+    def from_booster(cls, booster) -> "CompiledForest":
+        """Export the trees of an `xgb.Booster` into flat arrays."""
+        model = json.loads(booster.save_raw("json"))
+        learner = model["learner"]
+        gbm = learner["gradient_booster"]
+
+        if gbm["name"] != "gbtree":
+            raise ValueError(f"Unsupported booster type: {gbm['name']}")
+        model_param = learner["learner_model_param"]
+        if int(model_param.get("num_class", "0")) > 1 or int(model_param.get("num_target", "1")) > 1:
+            raise ValueError("Multi-class / multi-target models are not supported")
+
+        objective = learner["objective"]["name"]
+        if objective in _LOGISTIC_OBJECTIVES:
+            logistic = True
+        elif objective in _IDENTITY_OBJECTIVES:
+            logistic = False
+        else:
+            raise ValueError(f"Unsupported objective: {objective}")
+
+        # base_score is stored in output space, e.g. "[2.888889E-1]"
+        base_score = float(str(model_param["base_score"]).strip("[]"))
+        if logistic:
+            base_margin = float(np.log(base_score / (1.0 - base_score)))
+        else:
+            base_margin = base_score
+
+        trees = gbm["model"]["trees"]
+        if not trees:
+            raise ValueError("Booster has no trees")
+        n_trees = len(trees)
+        max_nodes = max(len(tree["left_children"]) for tree in trees)
+
+        size = n_trees * max_nodes
+        feature = np.zeros(size, dtype=np.int32)
+        threshold = np.zeros(size, dtype=np.float32)
+        left = np.zeros(size, dtype=np.int32)
+        right = np.zeros(size, dtype=np.int32)
+        default_left = np.zeros(size, dtype=bool)
+        leaf_value = np.zeros(size, dtype=np.float32)
+        depth = 0
+
+        for t, tree in enumerate(trees):
+            if any(tree.get("split_type", [])) or tree.get("categories"):
+                raise ValueError("Categorical splits are not supported")
+
+            lc = np.asarray(tree["left_children"], dtype=np.int32)
+            rc = np.asarray(tree["right_children"], dtype=np.int32)
+            n = len(lc)
+            start = t * max_nodes
+            own = np.arange(n, dtype=np.int32)
+            is_leaf = lc == -1
+
+            feature[start:start + n] = np.where(is_leaf, 0, tree["split_indices"])
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            # For leaves XGBoost stores the leaf weight in split_conditions
+            threshold[start:start + n] = np.where(is_leaf, 0.0, conditions)
+            leaf_value[start:start + n] = np.where(is_leaf, conditions, 0.0)
+            left[start:start + n] = np.where(is_leaf, own, lc)
+            right[start:start + n] = np.where(is_leaf, own, rc)
+            default_left[start:start + n] = np.asarray(tree["default_left"], dtype=bool)
+            # Padding slots are never reached; make them self-looping leaves anyway
+            pad = np.arange(n, max_nodes, dtype=np.int32)
+            left[start + n:start + max_nodes] = pad
+            right[start + n:start + max_nodes] = pad
+
+            depth = max(depth, cls._tree_depth(lc, rc))
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            left=left,
+            right=right,
+            default_left=default_left,
+            leaf_value=leaf_value,
+            n_trees=n_trees,
+            max_nodes=max_nodes,
+            depth=depth,
+            base_margin=base_margin,
+            logistic=logistic,
+            n_features=int(model_param["num_feature"]),
+        )
+
+    @staticmethod
+    def _tree_depth(lc: np.ndarray, rc: np.ndarray) -> int:
+        depth = 0
+        frontier = [0]
+        while True:
+            children = [c for node in frontier for c in (lc[node], rc[node]) if c != -1]
+            if not children:
+                return depth
+            depth += 1
+            frontier = children
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (self.feature, self.threshold, self.left, self.right, self.default_left, self.leaf_value)
+        )
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+        # Flat node index per (row, tree); every tree starts at its root
+        nodes = np.repeat(self._tree_offsets, n_rows, axis=0)
+
+        for _ in range(self.depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = np.where(
+                np.isnan(values), self.default_left[nodes], values < self.threshold[nodes]
+            )
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes]) + self._tree_offsets
+
+        return self.leaf_value[nodes].sum(axis=1, dtype=np.float32) + self.base_margin
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Same output space as `Booster.predict` (probabilities for logistic models)."""
+        margin = self.predict_margin(X)
+        if self.logistic:
+            return 1.0 / (1.0 + np.exp(-margin))
+        return margin
@@ -0,0 +1,148 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ASGI scope of the request being served (set by MetricsMiddleware). The router
+# records the matched route in it, so metrics recorded deep in services are
+# labelled with the route template, never the raw path (see route_label).
+current_scope: ContextVar[dict | None] = ContextVar("current_scope", default=None)
+
+
+def route_label(scope: dict | None) -> str:
+    """
+    Matched path template (/patients/{patient_id}) of a request scope;
+    "unmatched" before or without a route match, "internal" outside a
+    request (warmup, reloads).
+    """
+    if scope is None:
+        return "internal"
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+# Latency buckets (seconds): 50 µs .. 10 s, dense below 10 ms where inference lives
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus data model.
+    One (counts, sum) slot per label combination; observe() is a bisect and
+    a couple of additions under a lock.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum]
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labelvalues, counts, total in sorted(snapshot):
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = ",".join(pairs + [f'le="{_format_bound(bound)}"'])
+                lines.append(f"{self.name}_bucket{{{labels}}} {cumulative}")
+            labels = "{" + ",".join(pairs) + "}" if pairs else ""
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+_registry: dict[str, Histogram] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, documentation: str, labelnames: tuple[str, ...], buckets=DEFAULT_BUCKETS) -> Histogram:
+    """Get or create a process-wide histogram."""
+    with _registry_lock:
+        existing = _registry.get(name)
+        if existing is None:
+            existing = _registry[name] = Histogram(name, documentation, labelnames, buckets)
+        return existing
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Metrics shared across the app ---
+HTTP_REQUEST_SECONDS = histogram(
+    "emp_http_request_duration_seconds",
+    "End-to-end HTTP request latency.",
+    ("route", "method", "status"),
+)
+INFERENCE_STAGE_SECONDS = histogram(
+    "emp_inference_stage_duration_seconds",
+    "Time spent in each stage of the prediction path.",
+    ("stage", "route", "model_id"),
+)
+AUTH_MIDDLEWARE_SECONDS = histogram(
+    "emp_auth_middleware_duration_seconds",
+    "Time spent in the JWT auth middleware, excluding the downstream handler.",
+    ("outcome",),
+)
+SUPABASE_CALL_SECONDS = histogram(
+    "emp_supabase_call_duration_seconds",
+    "Latency of Supabase calls made by the services.",
+    ("table", "operation"),
+)
+
+
+@contextmanager
+def inference_stage(stage: str, model_id: str):
+    """Time one prediction stage, labelled with the current route."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        INFERENCE_STAGE_SECONDS.observe(
+            time.perf_counter() - started, stage, route_label(current_scope.get()), model_id
+        )
+
+
+def supabase_call(table: str, operation: str):
+    """Time one Supabase request: `with supabase_call("patients", "select"): ...execute()`."""
+    return SUPABASE_CALL_SECONDS.time(table, operation)
@@ -1,4 +1,10 @@
+import hashlib
+import json
 import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from supabase import create_client, Client
 from dotenv import load_dotenv
@@ -7,54 +13,224 @@ from dotenv import load_dotenv
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 ML_ENGINE_DIR = BASE_DIR / "app/ml_engine"
 
-def sync_models_from_cloud():
+# Files to download
+ARTIFACTS = (
+    "foundation_model_v1.ubj",
+    "model_signature.json",
+    "master_eeg_features.csv",
+)
+
+# What is currently installed in the target dir: {name: {"etag", "sha256", "size"}}
+MANIFEST_FILE = ".manifest.json"
+# Content-addressed blob store (<sha256> files) + remote etag -> sha256 index
+CACHE_DIR = ".artifact-cache"
+CACHE_INDEX_FILE = "index.json"
+_BLOB_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+# The watcher thread and POST /ml/admin/reload both sync; one at a time
+_sync_lock = threading.Lock()
+
+
+class LocalBucket:
     """
-    Downloads the latest model artifacts from Supabase Storage
-    into the local ml_engine folder.
+    Filesystem stand-in for a Supabase storage bucket: same `list()` /
+    `download()` surface as `client.storage.from_(bucket)`, backed by a
+    directory. The eTag is derived from mtime and size, like a storage
+    object's metadata changes on every upload.
     """
-    print("☁️ CHECKING MODEL REGISTRY FOR UPDATES...")
-    
-    # Ensure local folder exists
-    ML_ENGINE_DIR.mkdir(parents=True, exist_ok=True)
 
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def list(self, path: str | None = None, options: dict | None = None) -> list[dict]:
+        items = []
+        for entry in sorted(self.root.iterdir()):
+            if entry.is_file():
+                st = entry.stat()
+                items.append({
+                    "name": entry.name,
+                    "metadata": {"eTag": f'"{st.st_mtime_ns:x}-{st.st_size:x}"', "size": st.st_size},
+                })
+        return items
+
+    def download(self, path: str, options: dict | None = None) -> bytes:
+        return (self.root / path).read_bytes()
+
+
+def _registry_bucket():
+    """Storage bucket of the Supabase model registry, or None without credentials."""
     # Load Env Variables
     load_dotenv()
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") # Ensure this is in backend-api/.env
 
     if not url or not key:
-        print("⚠️ Warning: No Cloud Credentials. Using local models.")
-        return
+        return None
+
+    supabase: Client = create_client(url, key)
+    return supabase.storage.from_("model-registry")
 
+
+def _read_json(path: Path) -> dict:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write to a unique temp file in the same directory, then rename into place."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
     try:
-        supabase: Client = create_client(url, key)
-        bucket = "model-registry"
-        
-        # Files to download
-        files_to_sync = [
-            "foundation_model_v1.ubj",
-            "model_signature.json",
-            "master_eeg_features.csv"
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _prune_cache(cache_dir: Path, cache_index: dict, installed: dict) -> int:
+    """
+    Drop blobs the installed manifest no longer references, and their index
+    entries, so the cache holds one copy of each current artifact at most.
+    """
+    keep = {meta.get("sha256") for meta in installed.values()}
+    pruned = 0
+    for blob in cache_dir.iterdir():
+        if _BLOB_NAME.match(blob.name) and blob.name not in keep:
+            blob.unlink(missing_ok=True)
+            pruned += 1
+    for etag in [etag for etag, sha in cache_index.items() if sha not in keep]:
+        del cache_index[etag]
+    return pruned
+
+
+def _remote_manifest(bucket) -> dict[str, dict]:
+    """{name: {"etag", "size"}} for the artifacts present in the bucket."""
+    manifest = {}
+    for item in bucket.list() or []:
+        name = item.get("name")
+        if name not in ARTIFACTS:
+            continue
+        metadata = item.get("metadata") or {}
+        etag = metadata.get("eTag") or metadata.get("etag")
+        if not etag:
+            # No eTag exposed: size + last-modified still change on every upload
+            etag = f"{metadata.get('size')}-{metadata.get('lastModified') or item.get('updated_at')}"
+        manifest[name] = {"etag": etag.strip('"'), "size": metadata.get("size")}
+    return manifest
+
+
+def _is_current(target: Path, installed: dict | None, remote: dict) -> bool:
+    if not installed or installed.get("etag") != remote["etag"]:
+        return False
+    # Metadata-only check: no hashing on the cold-start path
+    try:
+        return target.stat().st_size == installed.get("size")
+    except FileNotFoundError:
+        return False
+
+
+def sync_models_from_cloud(bucket=None, target_dir: Path = ML_ENGINE_DIR, max_workers: int = 3) -> bool:
+    """
+    Downloads the latest model artifacts from Supabase Storage
+    into the local ml_engine folder.
+
+    Only artifacts whose remote eTag differs from the installed manifest are
+    fetched (in parallel); content already in the local blob cache is reused
+    without a download. Files are written to a temp path and renamed into
+    place, so a reader never sees a partial artifact. Pass a `LocalBucket`
+    (or any object with `list()`/`download()`) to sync from somewhere other
+    than the Supabase registry.
+
+    Returns True when at least one artifact changed on disk. Syncs in one
+    process run one at a time.
+    """
+    with _sync_lock:
+        return _sync(bucket, Path(target_dir), max_workers)
+
+
+def _sync(bucket, target_dir: Path, max_workers: int) -> bool:
+    print("☁️ CHECKING MODEL REGISTRY FOR UPDATES...")
+
+    # Ensure local folder exists
+    target_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir = target_dir / CACHE_DIR
+    cache_dir.mkdir(exist_ok=True)
+
+    try:
+        if bucket is None:
+            bucket = _registry_bucket()
+        if bucket is None:
+            print("⚠️ Warning: No Cloud Credentials. Using local models.")
+            return False
+
+        remote = _remote_manifest(bucket)
+        for filename in ARTIFACTS:
+            if filename not in remote:
+                print(f"   ⚠️ {filename} not in registry; keeping local copy.")
+
+        manifest_path = target_dir / MANIFEST_FILE
+        installed = _read_json(manifest_path)
+        stale = [
+            name for name, meta in remote.items()
+            if not _is_current(target_dir / name, installed.get(name), meta)
         ]
+        if not stale:
+            print("✅ AI SYSTEM UP TO DATE (no downloads).")
+            return False
+
+        index_path = cache_dir / CACHE_INDEX_FILE
+        cache_index = _read_json(index_path)
+
+        def fetch(filename: str) -> tuple[str, str, bytes]:
+            etag = remote[filename]["etag"]
+            sha = cache_index.get(etag)
+            if sha and (cache_dir / sha).exists():
+                print(f"   ♻️ {filename} found in local cache.")
+                return filename, sha, (cache_dir / sha).read_bytes()
 
-        for filename in files_to_sync:
             print(f"   ⬇️ Syncing {filename}...")
-            
             # Download bytes
-            data = supabase.storage.from_(bucket).download(filename)
-            
-            # Write to disk
-            local_path = ML_ENGINE_DIR / filename
-            with open(local_path, "wb") as f:
-                f.write(data)
-                
-        print("✅ AI SYSTEM SYNCHRONIZED.")
+            data = bucket.download(filename)
+            sha = hashlib.sha256(data).hexdigest()
+            if not (cache_dir / sha).exists():
+                _atomic_write(cache_dir / sha, data)
+            return filename, sha, data
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            fetched = list(pool.map(fetch, stale))
+
+        # Write to disk (temp + rename, after every download succeeded)
+        changed = 0
+        for filename, sha, data in fetched:
+            target = target_dir / filename
+            # Re-uploaded but identical content: keep the file (and its mtime) as is
+            if installed.get(filename, {}).get("sha256") != sha or not target.exists():
+                _atomic_write(target, data)
+                changed += 1
+            installed[filename] = {"etag": remote[filename]["etag"], "sha256": sha, "size": len(data)}
+            cache_index[remote[filename]["etag"]] = sha
+
+        pruned = _prune_cache(cache_dir, cache_index, installed)
+        if pruned:
+            print(f"   🧹 Pruned {pruned} superseded artifact(s) from the cache.")
+        _atomic_write(index_path, json.dumps(cache_index, indent=2).encode())
+        _atomic_write(manifest_path, json.dumps(installed, indent=2).encode())
+
+        print(f"✅ AI SYSTEM SYNCHRONIZED ({changed} artifact(s) updated).")
+        return changed > 0
 
     except Exception as e:
         print(f"⚠️ Cloud Sync Failed: {e}")
         print("   ➡️ Falling back to existing local models.")
+        return False
 
 
 if __name__ == "__main__":
     # This block runs ONLY when you execute the file directly
-    sync_models_from_cloud()
\ No newline at end of file
+    sync_models_from_cloud()
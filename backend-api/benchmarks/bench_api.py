@@ -0,0 +1,259 @@
+"""
+End-to-end API benchmark: drives the real FastAPI app in-process (httpx ASGI
+transport) against an in-memory Supabase stand-in, so route, middleware,
+service and model code are all on the measured path but no network or live
+database is.
+
+Run from backend-api/:
+    python -m benchmarks.bench_api --concurrency 1,16,64 --requests 500 \\
+        --db-latency-ms 5 --output bench_api.json
+
+Each scenario is run once per concurrency level; p50/p95/p99 latency,
+throughput and error counts are printed and written to --output as JSON.
+"""
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import platform
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable
+
+import numpy as np
+
+# Settings are read at import time; nothing below talks to a real Supabase project.
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-jwt-secret")
+
+import httpx  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import supabase_client  # noqa: E402
+from app.services.ml_service import predictor  # noqa: E402
+from benchmarks.fake_supabase import FakeSupabase  # noqa: E402
+
+@functools.lru_cache(maxsize=None)
+def _token(user_id: str, role: str) -> str:
+    """A Supabase-shaped access token signed with the benchmark secret (one per user)."""
+    now = int(time.time())
+    claims = {
+        "sub": user_id,
+        "aud": settings.jwt_audience,
+        "role": "authenticated",
+        "app_metadata": {"role": role},
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, settings.supabase_jwt_secret, algorithm="HS256")
+
+
+@dataclass
+class Scenario:
+    name: str
+    # (request index) -> (method, url, headers, json body)
+    build: Callable[[int], tuple[str, str, dict, dict | None]]
+
+
+def _as(user_id: str, role: str) -> dict:
+    return {"Authorization": f"Bearer {_token(user_id, role)}"}
+
+
+def build_scenarios(users: dict, demo_files: list[str], seed: int = 7) -> list[Scenario]:
+    rng = random.Random(seed)
+    patients, clinicians, assignments = users["patients"], users["clinicians"], users["assignments"]
+
+    def predict(i):
+        body = {
+            "hours_of_sleep": round(rng.uniform(3, 10), 2),
+            "stress_level": rng.randint(0, 10),
+            "medication_taken": rng.randint(0, 1),
+            "eeg_profile_id": "chb01",
+        }
+        return "POST", "/ml/predict", {}, body
+
+    def create_log(i):
+        body = {
+            "hours_of_sleep": round(rng.uniform(3, 10), 1),
+            "stress_level": rng.randint(0, 10),
+            "medication_taken": bool(rng.randint(0, 1)),
+            "seizure_occurred": False,
+        }
+        return "POST", "/logs/me", _as(patients[i % len(patients)], "patient"), body
+
+    def create_logs_bulk(i):
+        # A 30-day offline backlog per request, on days no other request uses
+        patient = i % len(patients)
+        first = (i // len(patients) + 1) * 30 + 60
+        entries = [
+            {
+                "hours_of_sleep": round(rng.uniform(3, 10), 1),
+                "stress_level": rng.randint(0, 10),
+                "medication_taken": bool(rng.randint(0, 1)),
+                "seizure_occurred": False,
+                "date": (date.today() - timedelta(days=first + d)).isoformat(),
+            }
+            for d in range(30)
+        ]
+        return "POST", "/logs/me/bulk", _as(patients[patient], "patient"), {"entries": entries}
+
+    def clinician_logs(i):
+        clinician_id, patient_id = assignments[i % len(assignments)]
+        return "GET", f"/logs/patient/{patient_id}", _as(clinician_id, "clinician"), None
+
+    scenarios = [
+        Scenario("ml_predict", predict),
+        Scenario("logs_me_list", lambda i: ("GET", "/logs/me", _as(patients[i % len(patients)], "patient"), None)),
+        Scenario("logs_me_create", create_log),
+        Scenario("logs_me_bulk", create_logs_bulk),
+        Scenario("patients_me", lambda i: ("GET", "/patients/me", _as(patients[i % len(patients)], "patient"), None)),
+        Scenario(
+            "patients_me_risk",
+            lambda i: ("GET", "/patients/me/risk", _as(patients[i % len(patients)], "patient"), None),
+        ),
+        Scenario(
+            "clinician_dashboard",
+            lambda i: ("GET", "/clinicians/me/dashboard", _as(clinicians[i % len(clinicians)], "clinician"), None),
+        ),
+        Scenario("clinician_patient_logs", clinician_logs),
+        Scenario("demo_patients", lambda i: ("GET", "/demo/patients", {}, None)),
+    ]
+    if demo_files:
+        scenarios.append(Scenario(
+            "demo_patient",
+            lambda i: ("GET", f"/demo/patient/{demo_files[i % len(demo_files)]}", {}, None),
+        ))
+    return scenarios
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    counter = itertools.count()
+
+    async def worker():
+        while (i := next(counter)) < requests:
+            method, url, headers, body = scenario.build(i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, headers=headers, json=body)
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_started
+
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def install_fake_supabase(fake: FakeSupabase) -> None:
+    """
+    Make the in-memory client the process-wide async Supabase client, which
+    is what every service picks up by default. (dependency_overrides would
+    re-analyse each override on every request and skew the numbers.)
+    """
+    supabase_client._async_admin_client = fake
+
+
+async def main_async(args) -> dict:
+    fake = FakeSupabase(latency_ms=args.db_latency_ms)
+    users = fake.seed(
+        clinicians=args.clinicians,
+        patients_per_clinician=args.patients_per_clinician,
+        logs_per_patient=args.logs_per_patient,
+    )
+    install_fake_supabase(fake)
+
+    # What the lifespan would do, minus the registry sync
+    predictor.warmup()
+    app.state.warmed_up = True
+
+    demo_files = sorted(f for f in os.listdir("csv_data") if f.endswith(".csv")) if os.path.isdir("csv_data") else []
+    scenarios = build_scenarios(users, demo_files)
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        scenarios = [scenario for scenario in scenarios if scenario.name in wanted]
+
+    # Unhandled app errors come back as 500s (counted) rather than raising here
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    results: dict[str, list[dict]] = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in scenarios:
+            # Warm the route (imports, caches, pydantic validators) outside the measurement
+            await run_scenario(client, scenario, min(args.warmup, args.requests), 1)
+            for concurrency in args.concurrency:
+                result = await run_scenario(client, scenario, args.requests, concurrency)
+                results.setdefault(scenario.name, []).append(result)
+                print(
+                    f"{scenario.name:<20} c={concurrency:<4} "
+                    f"p50={result['p50_ms']:>8.2f}ms  p95={result['p95_ms']:>8.2f}ms  "
+                    f"p99={result['p99_ms']:>8.2f}ms  {result['throughput_rps']:>8.1f} req/s"
+                    + (f"  errors={result['errors']}" if result["errors"] else "")
+                )
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "db_latency_ms": args.db_latency_ms,
+            "requests_per_run": args.requests,
+            "seed": {
+                "clinicians": args.clinicians,
+                "patients_per_clinician": args.patients_per_clinician,
+                "logs_per_patient": args.logs_per_patient,
+            },
+            "supabase_round_trips": fake.calls,
+            "model_version": predictor.bundle.version if predictor.bundle else None,
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", default="", help="comma-separated subset of scenario names")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="simulated Supabase round-trip time")
+    parser.add_argument("--clinicians", type=int, default=5)
+    parser.add_argument("--patients-per-clinician", type=int, default=20)
+    parser.add_argument("--logs-per-patient", type=int, default=60)
+    parser.add_argument("--output", default="", help="write results to this JSON file")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",") if level]
+
+    report = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Inference latency benchmark: stock xgboost path vs the compiled NumPy forest.
+
+Run from backend-api/:
+    python -m benchmarks.bench_inference --iterations 5000 --batch-size 1000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+# The ML service reads Settings at import time; the benchmark never talks to Supabase.
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+
+from app.services.ml_service import MLService  # noqa: E402
+from app.services.model_bundle import BASELINE_EEG  # noqa: E402
+
+
+def _random_inputs(n: int, seed: int = 42) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "hours_of_sleep": round(float(rng.uniform(0, 12)), 1),
+            "stress_level": int(rng.integers(0, 11)),
+            "medication_taken": int(rng.integers(0, 2)),
+        }
+        for _ in range(n)
+    ]
+
+
+def _percentiles(samples: list[float]) -> dict:
+    us = np.asarray(samples) * 1e6
+    return {
+        "p50_us": round(float(np.percentile(us, 50)), 1),
+        "p99_us": round(float(np.percentile(us, 99)), 1),
+        "mean_us": round(float(us.mean()), 1),
+    }
+
+
+def bench_engine(service: MLService, inputs: list[dict], batch_size: int, warmup: int) -> dict:
+    """
+    Time assemble + score on the serving bundle directly, so the risk table /
+    LRU in MLService.predict don't turn the measurement into cache lookups.
+    """
+    bundle = service.bundle
+    for row in inputs[:warmup]:
+        bundle.score(bundle.assembler.assemble(row, BASELINE_EEG))
+
+    single = []
+    for row in inputs:
+        start = time.perf_counter()
+        bundle.score(bundle.assembler.assemble(row, BASELINE_EEG))
+        single.append(time.perf_counter() - start)
+
+    batches = []
+    for i in range(0, len(inputs), batch_size):
+        chunk = inputs[i:i + batch_size]
+        start = time.perf_counter()
+        bundle.score(bundle.assembler.assemble_batch(chunk, BASELINE_EEG))
+        batches.append(time.perf_counter() - start)
+
+    return {"single_row": _percentiles(single), f"batch_{batch_size}": _percentiles(batches)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000, help="single-row predictions per engine")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+
+    inputs = _random_inputs(args.iterations)
+    services = {engine: MLService(engine=engine) for engine in ("xgboost", "compiled")}
+    for service in services.values():
+        service.warmup()
+
+    if services["compiled"].forest is None:
+        raise SystemExit("Compiled engine failed to build; see log above.")
+
+    # Parity check before timing anything
+    matrix = services["xgboost"].assembler.assemble_batch(inputs, BASELINE_EEG)
+    drift = np.max(np.abs(services["compiled"].forest.predict(matrix) - services["xgboost"].model.inplace_predict(matrix)))
+    print(f"\nmax |compiled - xgboost| over {len(inputs)} rows: {drift:.2e}")
+
+    for engine, service in services.items():
+        result = bench_engine(service, inputs, args.batch_size, args.warmup)
+        print(f"\n[{engine}]")
+        for mode, stats in result.items():
+            print(f"  {mode:<12} p50={stats['p50_us']:>9.1f}us  p99={stats['p99_us']:>9.1f}us  mean={stats['mean_us']:>9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
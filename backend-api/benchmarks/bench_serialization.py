@@ -0,0 +1,109 @@
+"""
+Log-list serialisation micro-benchmark: CPU per row for the ways a page of
+patient_logs rows can be turned into a response body.
+
+  validated       LogRead per row, response_model re-validation, JSONResponse
+                  (the path before the trusted-row fast path)
+  validated+orjson  same, rendered with ORJSONResponse (the new default class)
+  trusted         rows as selected, straight into ORJSONResponse (GET /logs/...)
+
+Run from backend-api/:
+    python -m benchmarks.bench_serialization --rows 100,1000 --repeats 50
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+# Settings are read at import time; nothing below talks to Supabase.
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+from app.logs.router import router as logs_router  # noqa: E402
+from app.logs.schemas import LogRead  # noqa: E402
+
+
+def _rows(n: int) -> list[dict]:
+    """patient_logs rows as PostgREST returns them (ISO strings for dates)."""
+    patient_id = str(uuid.uuid4())
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "hours_of_sleep": 4 + (i * 7) % 50 / 10,
+            "stress_level": i % 11,
+            "medication_taken": i % 5 != 0,
+            "seizure_occurred": i % 17 == 0,
+            "mood": "ok" if i % 3 else None,
+            "notes": None,
+            "date": (today - timedelta(days=i)).isoformat(),
+            "log_id": str(uuid.uuid4()),
+            "patient_id": patient_id,
+            "created_at": (now - timedelta(days=i)).isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+def _response_field():
+    for route in logs_router.routes:
+        if route.path == "/me" and "GET" in route.methods:
+            return route.response_field
+    raise RuntimeError("GET /logs/me not found")
+
+
+async def _validated(rows: list[dict], field, response_class) -> bytes:
+    models = [LogRead(**row) for row in rows]
+    content = await serialize_response(field=field, response_content=models, is_coroutine=True)
+    return response_class(content).body
+
+
+async def _trusted(rows: list[dict], field, response_class) -> bytes:
+    return ORJSONResponse(rows).body
+
+
+PATHS = {
+    "validated": (_validated, JSONResponse),
+    "validated+orjson": (_validated, ORJSONResponse),
+    "trusted": (_trusted, ORJSONResponse),
+}
+
+
+async def run(sizes: list[int], repeats: int) -> None:
+    field = _response_field()
+    for n in sizes:
+        rows = _rows(n)
+        baseline = None
+        for name, (path, response_class) in PATHS.items():
+            await path(rows, field, response_class)  # warm validators / caches
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                await path(rows, field, response_class)
+                samples.append(time.perf_counter() - started)
+            per_row_us = float(np.median(samples)) / n * 1e6
+            baseline = baseline or per_row_us
+            print(
+                f"rows={n:<6} {name:<18} {per_row_us:8.2f} µs/row  "
+                f"{float(np.median(samples)) * 1e3:8.2f} ms/page  x{baseline / per_row_us:5.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100,1000", help="comma-separated page sizes")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run([int(n) for n in args.rows.split(",") if n], args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+In-memory stand-in for the supabase `AsyncClient`, for benchmarks.
+
+Covers the PostgREST subset the services use (table().select/insert/delete/eq/
+in_/gte/lte/lt/or_/order/limit/single/maybe_single/execute, including embedded `table(columns)` selects over the
+foreign keys in RELATIONS, filtered with `embedded.column` filters) and
+auth.admin.create_user/get_user_by_id. Every round trip awaits
+`latency_ms`, so benchmarks see a realistic database cost without a network.
+"""
+import asyncio
+import re
+import threading
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+# (parent table, embedded table) -> (parent column, embedded column, one-to-many)
+RELATIONS = {
+    ("patient_accounts", "patients"): ("patient_id", "patient_id", False),
+    ("clinicians", "patients"): ("clinician_id", "primary_clinician_id", True),
+    ("patients", "patient_logs"): ("patient_id", "patient_id", True),
+}
+
+# `name(cols)` or `name!fk_hint(cols)`
+_EMBED = re.compile(r"^(\w+)(?:!\w+)?\((.*)\)$", re.S)
+
+
+_OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+}
+
+
+def _condition(column: str, op: str, value):
+    # Rows and filter values are compared as strings, like the ISO dates / uuids they hold
+    compare = _OPERATORS[op]
+    return lambda row: row.get(column) is not None and compare(str(row[column]), str(value))
+
+
+def _parse_logic(kind: str, filters: str):
+    """`a.lt.1,and(b.eq.2,c.lt.3)` -> predicate (the or_/and() filter syntax)."""
+    conditions = []
+    for part in _split_columns(filters):
+        nested = re.match(r"^(and|or)\((.*)\)$", part)
+        if nested:
+            conditions.append(_parse_logic(nested.group(1), nested.group(2)))
+        else:
+            column, op, value = part.split(".", 2)
+            conditions.append(_condition(column, op, value))
+    combine = any if kind == "or" else all
+    return lambda row: combine(condition(row) for condition in conditions)
+
+
+def _split_columns(columns: str) -> list[str]:
+    """Split a select string on top-level commas (embedded column lists stay whole)."""
+    parts, depth, current = [], 0, ""
+    for char in columns:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += (char == "(") - (char == ")")
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = None
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self._columns: list[str] | None = None
+        self._embeds: dict[str, str] = {}
+        self._filters: list[tuple[str, object]] = []
+        # Range / or_ conditions: row -> bool
+        self._conditions: list = []
+        self._orders: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+        self._embed_order: dict[str, tuple[str, bool]] = {}
+        # embedded table -> [(filter method, column, value)] ("patients.patient_logs.date" style filters)
+        self._nested: dict[str, list[tuple[str, str, object]]] = {}
+        self._single = False
+        self._maybe = False
+        self._insert: list[dict] | None = None
+        self._delete = False
+
+    # --- builder surface used by the services ---
+    def select(self, columns: str = "*", **_):
+        plain = []
+        for part in _split_columns(columns):
+            match = _EMBED.match(part)
+            if match:
+                self._embeds[match.group(1)] = match.group(2)
+            else:
+                plain.append(part)
+        if plain != ["*"]:
+            self._columns = plain
+        return self
+
+    def insert(self, data, **_):
+        self._insert = data if isinstance(data, list) else [data]
+        return self
+
+    def delete(self, **_):
+        self._delete = True
+        return self
+
+    def _embedded_filter(self, method: str, column: str, value) -> bool:
+        """Defer a filter on an embedded table to its nested query."""
+        if "." not in column:
+            return False
+        embedded, column = column.split(".", 1)
+        self._nested.setdefault(embedded, []).append((method, column, value))
+        return True
+
+    def eq(self, column: str, value):
+        if not self._embedded_filter("eq", column, value):
+            self._filters.append((column, value))
+        return self
+
+    def in_(self, column: str, values):
+        if not self._embedded_filter("in_", column, values):
+            allowed = {str(value) for value in values}
+            self._conditions.append(lambda row: str(row.get(column)) in allowed)
+        return self
+
+    def gte(self, column: str, value):
+        if not self._embedded_filter("gte", column, value):
+            self._conditions.append(_condition(column, "gte", value))
+        return self
+
+    def lte(self, column: str, value):
+        if not self._embedded_filter("lte", column, value):
+            self._conditions.append(_condition(column, "lte", value))
+        return self
+
+    def lt(self, column: str, value):
+        if not self._embedded_filter("lt", column, value):
+            self._conditions.append(_condition(column, "lt", value))
+        return self
+
+    def or_(self, filters: str, **_):
+        self._conditions.append(_parse_logic("or", filters))
+        return self
+
+    def order(self, column: str, desc: bool = False, foreign_table: str | None = None, **_):
+        if foreign_table:
+            self._embed_order[foreign_table] = (column, desc)
+        else:
+            self._orders.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_):
+        self._limit = size
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._single = self._maybe = True
+        return self
+
+    async def execute(self) -> FakeResponse:
+        await self.client.round_trip()
+        with self.client.lock:
+            if self._insert is not None:
+                return FakeResponse([self.client.insert_row(self.table, row) for row in self._insert])
+            if self._delete:
+                return FakeResponse(self.client.delete_rows(self.table, self._matches))
+
+            candidates = (
+                self.client.lookup(self.table, *self._filters[0])
+                if self._filters else self.client.tables.setdefault(self.table, [])
+            )
+            rows = [row for row in candidates if self._matches(row)]
+            for order in reversed(self._orders):
+                rows = self._sorted(rows, order)
+            rows = [self._project(row) for row in rows[:self._limit]]
+
+        if self._single:
+            if len(rows) == 1:
+                return FakeResponse(rows[0])
+            # Like PostgREST: maybe_single() resolves to None on no rows, single() raises
+            if self._maybe and not rows:
+                return None
+            raise APIError({"message": "JSON object requested, multiple (or no) rows returned", "code": "PGRST116"})
+        return FakeResponse(rows)
+
+    def _matches(self, row: dict) -> bool:
+        return (
+            all(row.get(column) == value for column, value in self._filters)
+            and all(condition(row) for condition in self._conditions)
+        )
+
+    @staticmethod
+    def _sorted(rows: list[dict], order: tuple[str, bool] | None) -> list[dict]:
+        if not order:
+            return rows
+        column, desc = order
+        return sorted(rows, key=lambda row: row.get(column) or "", reverse=desc)
+
+    def _project(self, row: dict) -> dict:
+        """Selected columns of `row` plus its embedded relations; caller holds the lock."""
+        out = {column: row.get(column) for column in self._columns} if self._columns else dict(row)
+        for embedded, columns in self._embeds.items():
+            parent_column, child_column, many = RELATIONS[(self.table, embedded)]
+            nested = FakeQuery(self.client, embedded).select(columns)
+            for method, column, value in self._nested.get(embedded, []):
+                getattr(nested, method)(column, value)
+            children = [
+                child for child in self.client.lookup(embedded, child_column, row.get(parent_column))
+                if nested._matches(child)
+            ]
+            children = [nested._project(child) for child in self._sorted(children, self._embed_order.get(embedded))]
+            out[embedded] = children if many else (children[0] if children else None)
+        return out
+
+
+class FakeAuthAdmin:
+    def __init__(self, client: "FakeSupabase"):
+        self.client = client
+
+    async def create_user(self, attributes: dict):
+        await self.client.round_trip()
+        user_id = str(uuid.uuid4())
+        with self.client.lock:
+            self.client.users[user_id] = attributes
+        return SimpleNamespace(user=SimpleNamespace(id=user_id))
+
+    async def get_user_by_id(self, uid: str):
+        await self.client.round_trip()
+        uuid.UUID(uid)  # like gotrue's validate_uuid
+        attributes = self.client.users.get(uid)
+        if attributes is None:
+            raise LookupError("User not found")
+        return SimpleNamespace(user=SimpleNamespace(
+            id=uid, email=attributes.get("email"), app_metadata=attributes.get("app_metadata") or {},
+        ))
+
+
+class FakeSupabase:
+    """Drop-in for `supabase.AsyncClient` in LogsService, PatientService, ClinicianService and AuthService."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self.lock = threading.Lock()
+        self.tables: dict[str, list[dict]] = {}
+        # (table, column) -> value -> rows; built on first filter, kept current by insert_row
+        self.indexes: dict[tuple[str, str], dict] = {}
+        self.users: dict[str, dict] = {}
+        self.calls = 0
+        self.auth = SimpleNamespace(admin=FakeAuthAdmin(self))
+
+    async def round_trip(self) -> None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def lookup(self, table: str, column: str, value) -> list[dict]:
+        """Rows with row[column] == value via a lazily built hash index; caller holds the lock."""
+        index = self.indexes.get((table, column))
+        if index is None:
+            index = self.indexes[(table, column)] = {}
+            for row in self.tables.setdefault(table, []):
+                index.setdefault(row.get(column), []).append(row)
+        return index.get(value, [])
+
+    def insert_row(self, table: str, row: dict) -> dict:
+        """Apply the column defaults the real schema has (ids, timestamps); caller holds the lock."""
+        row = dict(row)
+        now = datetime.now(timezone.utc)
+        if table == "patients":
+            row.setdefault("patient_id", str(uuid.uuid4()))
+            row.setdefault("has_logs", False)
+        if table == "patient_logs":
+            row.setdefault("log_id", str(uuid.uuid4()))
+            row.setdefault("created_at", now.isoformat())
+            if row.get("date") in (None, "now()"):
+                row["date"] = now.date().isoformat()
+        self.tables.setdefault(table, []).append(row)
+        for (indexed_table, column), index in self.indexes.items():
+            if indexed_table == table:
+                index.setdefault(row.get(column), []).append(row)
+        return dict(row)
+
+    def delete_rows(self, table: str, matches) -> list[dict]:
+        """Remove the rows `matches` accepts (and their index entries); caller holds the lock."""
+        rows = self.tables.setdefault(table, [])
+        deleted = [row for row in rows if matches(row)]
+        if deleted:
+            gone = {id(row) for row in deleted}
+            rows[:] = [row for row in rows if id(row) not in gone]
+            for (indexed_table, _), index in self.indexes.items():
+                if indexed_table == table:
+                    for value, bucket in index.items():
+                        bucket[:] = [row for row in bucket if id(row) not in gone]
+        return [dict(row) for row in deleted]
+
+    def seed(self, clinicians: int = 5, patients_per_clinician: int = 20, logs_per_patient: int = 60) -> dict:
+        """
+        Populate clinicians, patients, patient_accounts and patient_logs.
+        Returns the auth user ids to impersonate, {"clinicians": [...], "patients": [...]},
+        and the (clinician_id, patient_id) pairs under "assignments".
+        """
+        clinician_ids, patient_users, assignments = [], [], []
+        today = date.today()
+        with self.lock:
+            for c in range(clinicians):
+                clinician_id = str(uuid.uuid4())
+                clinician_ids.append(clinician_id)
+                self.insert_row("clinicians", {
+                    "clinician_id": clinician_id,
+                    "email": f"clinician{c}@example.com",
+                    "full_name": f"Clinician {c}",
+                    "specialty": "Neurology",
+                    "is_active": True,
+                })
+                for p in range(patients_per_clinician):
+                    patient = self.insert_row("patients", {
+                        "assigned_model_id": None,
+                        "primary_clinician_id": clinician_id,
+                        "has_logs": logs_per_patient > 0,
+                    })
+                    user_id = str(uuid.uuid4())
+                    patient_users.append(user_id)
+                    assignments.append((clinician_id, patient["patient_id"]))
+                    self.insert_row("patient_accounts", {"user_id": user_id, "patient_id": patient["patient_id"]})
+                    for d in range(logs_per_patient):
+                        self.insert_row("patient_logs", {
+                            "patient_id": patient["patient_id"],
+                            "date": (today - timedelta(days=d)).isoformat(),
+                            "hours_of_sleep": 4 + (d * 7 + p) % 50 / 10,
+                            "stress_level": (d + p) % 11,
+                            "medication_taken": (d + p) % 5 != 0,
+                            "seizure_occurred": (d * 3 + p) % 17 == 0,
+                            "mood": None,
+                            "notes": None,
+                        })
+        return {"clinicians": clinician_ids, "patients": patient_users, "assignments": assignments}
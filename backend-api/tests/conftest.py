@@ -0,0 +1,7 @@
+import os
+
+# Settings are read at import time; the tests never talk to Supabase.
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
@@ -0,0 +1,128 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.middleware import auth as auth_module
+from app.middleware.auth import JWTAuthMiddleware, compile_public_matcher
+
+SECRET = "test-jwt-secret"
+AUDIENCE = "authenticated"
+
+
+async def echo_state(scope, receive, send):
+    """Downstream app: answers 200 with whatever the middleware put on the scope state."""
+    body = json.dumps(scope.get("state", {})).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _token(secret: str = SECRET, **overrides) -> str:
+    claims = {
+        "sub": "user-1",
+        "aud": AUDIENCE,
+        "exp": int(time.time()) + 3600,
+        "app_metadata": {"role": "clinician"},
+    }
+    claims.update(overrides)
+    return jwt.encode({k: v for k, v in claims.items() if v is not None}, secret, algorithm="HS256")
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def middleware() -> JWTAuthMiddleware:
+    return JWTAuthMiddleware(
+        echo_state,
+        public_paths=["/health"],
+        public_prefixes=["/auth"],
+        jwt_secret=SECRET,
+        audience=AUDIENCE,
+        cache_size=16,
+    )
+
+
+@pytest.fixture
+def client(middleware) -> TestClient:
+    return TestClient(middleware)
+
+
+def test_valid_token_exposes_user_and_role(client):
+    response = client.get("/patients/me", headers=_bearer(_token()))
+    assert response.status_code == 200
+    assert response.json() == {"user_id": "user-1", "role": "clinician"}
+
+
+def test_token_without_app_metadata_has_no_role(client):
+    response = client.get("/patients/me", headers=_bearer(_token(app_metadata=None)))
+    assert response.status_code == 200
+    assert response.json() == {"user_id": "user-1", "role": None}
+
+
+@pytest.mark.parametrize("token", [
+    pytest.param(_token(exp=int(time.time()) - 10), id="expired"),
+    pytest.param(_token(aud="someone-else"), id="wrong-audience"),
+    pytest.param(_token(aud=None), id="missing-audience"),
+    pytest.param(_token(sub=None), id="missing-sub"),
+    pytest.param(_token(secret="not-the-secret"), id="bad-signature"),
+    pytest.param("not.a.jwt", id="malformed"),
+])
+def test_invalid_tokens_are_rejected(client, token):
+    response = client.get("/patients/me", headers=_bearer(token))
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Basic abc"}, {"Authorization": "Bearer "}])
+def test_missing_bearer_is_rejected(client, headers):
+    assert client.get("/patients/me", headers=headers).status_code == 401
+
+
+def test_options_preflight_passes_through(client):
+    response = client.options("/patients/me")
+    assert response.status_code == 200
+    assert response.json() == {}
+
+
+def test_public_paths_skip_verification(client):
+    assert client.get("/health").status_code == 200
+    assert client.get("/auth/admin/invite-patient").status_code == 200
+    assert client.get("/healthz").status_code == 401
+
+
+@pytest.mark.parametrize("path, public", [
+    ("/auth", True),
+    ("/auth/", True),
+    ("/auth/admin/invite-patient", True),
+    ("/authx", False),
+    ("/authentication", False),
+    ("/health", True),
+    ("/health/", False),
+    ("/healthz", False),
+    ("/", True),
+    ("/patients", False),
+])
+def test_public_matcher_boundaries(path, public):
+    matcher = compile_public_matcher(["/health", "/"], ["/auth/"])
+    assert bool(matcher.match(path)) is public
+
+
+def test_empty_allow_list_matches_nothing():
+    assert compile_public_matcher([], []).match("/") is None
+
+
+def test_cached_claims_are_not_served_past_exp(middleware, client, monkeypatch):
+    token = _token(exp=int(time.time()) + 60)
+    assert client.get("/patients/me", headers=_bearer(token)).status_code == 200
+    assert middleware._claims.get(token.encode()) is not None
+
+    # A minute later the cached entry has expired: rejected, and dropped from the cache
+    later = time.time() + 120
+    monkeypatch.setattr(auth_module, "time", SimpleNamespace(time=lambda: later, perf_counter=time.perf_counter))
+    assert client.get("/patients/me", headers=_bearer(token)).status_code == 401
+    assert middleware._claims.get(token.encode()) is None
@@ -0,0 +1,31 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.metrics import MetricsMiddleware
+from app.utils.metrics import INFERENCE_STAGE_SECONDS, current_scope, inference_stage, route_label
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/label-test/{item_id}")
+    async def item(item_id: str):
+        with inference_stage("label_test", "foundation"):
+            return {"route": route_label(current_scope.get())}
+
+    return app
+
+
+def test_inference_metrics_use_the_route_template():
+    client = TestClient(_app())
+    for item_id in ("a", "b", "c"):
+        assert client.get(f"/label-test/{item_id}").json() == {"route": "/label-test/{item_id}"}
+
+    routes = {labels[1] for labels in INFERENCE_STAGE_SECONDS._series if labels[0] == "label_test"}
+    assert routes == {"/label-test/{item_id}"}
+
+
+def test_route_label_outside_a_match():
+    assert route_label(None) == "internal"
+    assert route_label({"type": "http", "path": "/nope"}) == "unmatched"
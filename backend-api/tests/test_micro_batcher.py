@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.services.ml_service import BatcherOverloaded, MicroBatcher
+
+
+class Scorer:
+    """Just enough of MLService for the batcher: rows with "bad" fail to score."""
+
+    def __init__(self):
+        self.calls = []
+
+    def lookup(self, input_data):
+        return None
+
+    def metric_model_id(self, input_data):
+        return "test"
+
+    def predict_batch(self, inputs, cache=True):
+        self.calls.append(len(inputs))
+        if any(row.get("bad") for row in inputs):
+            raise ValueError("unscorable row")
+        return [{"risk_score": row["n"]} for row in inputs]
+
+
+def test_full_queue_raises_overloaded():
+    scorer = Scorer()
+    batcher = MicroBatcher(scorer, max_batch_size=8, max_wait_ms=5.0, max_queue_size=2)
+
+    async def scenario():
+        # Nothing yields between submits, so the worker can't drain the queue
+        tasks = [asyncio.ensure_future(batcher.submit({"n": i})) for i in range(4)]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert results[:2] == [{"risk_score": 0}, {"risk_score": 1}]
+    assert all(isinstance(r, BatcherOverloaded) for r in results[2:])
+    assert batcher.stats()["rejected"] == 2
+
+
+def test_failed_batch_is_rescored_per_row():
+    scorer = Scorer()
+    batcher = MicroBatcher(scorer, max_batch_size=8, max_wait_ms=5.0)
+
+    async def scenario():
+        rows = [{"n": 0}, {"n": 1, "bad": True}, {"n": 2}]
+        return await asyncio.gather(*(batcher.submit(row) for row in rows), return_exceptions=True)
+
+    good, bad, other = asyncio.run(scenario())
+    assert good == {"risk_score": 0}
+    assert other == {"risk_score": 2}
+    assert isinstance(bad, ValueError)
+    assert scorer.calls == [3, 1, 1, 1]
+    assert batcher.stats()["batch_failures"] == 1
+
+
+def test_single_row_failure_is_not_retried():
+    scorer = Scorer()
+    batcher = MicroBatcher(scorer)
+
+    with pytest.raises(ValueError):
+        asyncio.run(batcher.submit({"n": 0, "bad": True}))
+    assert scorer.calls == [1]
@@ -0,0 +1,29 @@
+import shutil
+
+from app.services.ml_service import EEG_FILE, MODEL_FILE, SIGNATURE_FILE, MLService
+from app.services.model_bundle import ArtifactPaths
+from app.utils.model_loader import ML_ENGINE_DIR
+
+
+def test_model_synced_after_startup_is_picked_up(tmp_path, monkeypatch):
+    """The artifact directory is re-resolved on every check, not fixed at construction."""
+    synced, pipeline = tmp_path / "ml_engine", tmp_path / "pipeline"
+    synced.mkdir()
+    pipeline.mkdir()
+
+    def find_artifacts(self):
+        model_dir = synced if (synced / MODEL_FILE).exists() else pipeline
+        return ArtifactPaths(model_dir / MODEL_FILE, model_dir / SIGNATURE_FILE, synced / EEG_FILE)
+
+    monkeypatch.setattr(MLService, "_find_artifacts", find_artifacts)
+    service = MLService(models_dir=str(tmp_path / "models"), shadow_dir=str(tmp_path / "shadow"))
+    assert service.reload_if_changed() is False  # nothing anywhere yet
+    assert service.bundle is None
+
+    # First registry sync lands after startup
+    for name in (MODEL_FILE, SIGNATURE_FILE, EEG_FILE):
+        shutil.copy(ML_ENGINE_DIR / name, synced / name)
+
+    assert service.reload_if_changed() is True
+    assert service.paths.model == synced / MODEL_FILE
+    assert service.predict({"hours_of_sleep": 7.0, "stress_level": 3, "medication_taken": 1})["status"]
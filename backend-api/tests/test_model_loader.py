@@ -0,0 +1,139 @@
+import json
+import os
+
+import pytest
+
+from app.utils import model_loader
+from app.utils.model_loader import (
+    ARTIFACTS,
+    CACHE_DIR,
+    CACHE_INDEX_FILE,
+    MANIFEST_FILE,
+    LocalBucket,
+    _atomic_write,
+    _prune_cache,
+    sync_models_from_cloud,
+)
+
+
+class CountingBucket(LocalBucket):
+    """LocalBucket that records downloads and can fail one artifact."""
+
+    def __init__(self, root, fail: str | None = None):
+        super().__init__(root)
+        self.downloads: list[str] = []
+        self.fail = fail
+
+    def download(self, path, options=None):
+        if path == self.fail:
+            raise OSError(f"network error fetching {path}")
+        self.downloads.append(path)
+        return super().download(path, options)
+
+
+def _publish(root, version: str) -> None:
+    for name in ARTIFACTS:
+        path = root / name
+        path.write_bytes(f"{name} {version}".encode())
+        # Distinct eTag per upload even when the size is unchanged
+        stamp = int(version.lstrip("v")) * 1_000_000_000
+        os.utime(path, ns=(stamp, stamp))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    bucket_dir, target = tmp_path / "bucket", tmp_path / "ml_engine"
+    bucket_dir.mkdir()
+    _publish(bucket_dir, "v1")
+    return bucket_dir, target
+
+
+def test_first_sync_installs_everything(registry):
+    bucket_dir, target = registry
+    bucket = CountingBucket(bucket_dir)
+
+    assert sync_models_from_cloud(bucket, target) is True
+    assert sorted(bucket.downloads) == sorted(ARTIFACTS)
+    for name in ARTIFACTS:
+        assert (target / name).read_bytes() == (bucket_dir / name).read_bytes()
+    manifest = json.loads((target / MANIFEST_FILE).read_text())
+    assert set(manifest) == set(ARTIFACTS)
+
+
+def test_unchanged_artifacts_are_skipped(registry):
+    bucket_dir, target = registry
+    sync_models_from_cloud(LocalBucket(bucket_dir), target)
+    bucket = CountingBucket(bucket_dir)
+
+    assert sync_models_from_cloud(bucket, target) is False
+    assert bucket.downloads == []
+
+
+def test_changed_artifact_is_downloaded_again(registry):
+    bucket_dir, target = registry
+    sync_models_from_cloud(LocalBucket(bucket_dir), target)
+    old_sha = json.loads((target / MANIFEST_FILE).read_text())[ARTIFACTS[0]]["sha256"]
+
+    _publish(bucket_dir, "v2")
+    bucket = CountingBucket(bucket_dir)
+    assert sync_models_from_cloud(bucket, target) is True
+
+    assert sorted(bucket.downloads) == sorted(ARTIFACTS)
+    assert (target / ARTIFACTS[0]).read_bytes() == f"{ARTIFACTS[0]} v2".encode()
+    assert json.loads((target / MANIFEST_FILE).read_text())[ARTIFACTS[0]]["sha256"] != old_sha
+
+
+def test_failed_fetch_leaves_installed_artifacts_untouched(registry):
+    bucket_dir, target = registry
+    sync_models_from_cloud(LocalBucket(bucket_dir), target)
+    before = {name: (target / name).read_bytes() for name in ARTIFACTS}
+    manifest = (target / MANIFEST_FILE).read_bytes()
+
+    _publish(bucket_dir, "v2")
+    assert sync_models_from_cloud(CountingBucket(bucket_dir, fail=ARTIFACTS[1]), target) is False
+
+    # Nothing is renamed into place unless every download succeeded
+    assert {name: (target / name).read_bytes() for name in ARTIFACTS} == before
+    assert (target / MANIFEST_FILE).read_bytes() == manifest
+    assert not list(target.rglob("*.tmp"))
+
+
+def test_atomic_write_failure_leaves_no_partial_file(tmp_path, monkeypatch):
+    path = tmp_path / "model.ubj"
+    path.write_bytes(b"old")
+
+    def broken_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(model_loader.os, "fsync", broken_fsync)
+    with pytest.raises(OSError):
+        _atomic_write(path, b"new contents")
+
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["model.ubj"]
+
+
+def test_prune_cache_drops_unreferenced_blobs(tmp_path):
+    cache_dir = tmp_path / CACHE_DIR
+    cache_dir.mkdir()
+    current, stale = "a" * 64, "b" * 64
+    for blob in (current, stale):
+        (cache_dir / blob).write_bytes(b"x")
+    (cache_dir / CACHE_INDEX_FILE).write_text("{}")
+    index = {"etag-current": current, "etag-stale": stale}
+
+    pruned = _prune_cache(cache_dir, index, {"model.ubj": {"sha256": current}})
+
+    assert pruned == 1
+    assert sorted(p.name for p in cache_dir.iterdir()) == sorted([current, CACHE_INDEX_FILE])
+    assert index == {"etag-current": current}
+
+
+def test_repeated_uploads_keep_one_blob_per_artifact(registry):
+    bucket_dir, target = registry
+    for version in ("v1", "v2", "v3"):
+        _publish(bucket_dir, version)
+        sync_models_from_cloud(LocalBucket(bucket_dir), target)
+
+    blobs = [p for p in (target / CACHE_DIR).iterdir() if p.name != CACHE_INDEX_FILE]
+    assert len(blobs) == len(ARTIFACTS)
@@ -0,0 +1,54 @@
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.ml_service import predictor
+from app.services.risk_table import SLEEP_MAX, SLEEP_STEPS_PER_HOUR, STRESS_MAX, RiskTable
+
+
+@pytest.fixture
+def table() -> RiskTable:
+    shape = (1, int(SLEEP_MAX * SLEEP_STEPS_PER_HOUR) + 1, STRESS_MAX + 1, 2)
+    return RiskTable(["chb01"], np.arange(np.prod(shape), dtype=np.float32).reshape(shape) / 1e5)
+
+
+def _row(sleep, stress, meds=1):
+    return {"hours_of_sleep": sleep, "stress_level": stress, "medication_taken": meds}
+
+
+def test_on_grid_input_is_looked_up(table):
+    assert table.lookup("chb01", _row(7.5, 3)) == pytest.approx(float(table.risks[0, 75, 3, 1]))
+
+
+@pytest.mark.parametrize("sleep, stress", [
+    (math.nan, 3), (math.inf, 3), (-math.inf, 3), (7.0, math.nan), (7.0, math.inf),
+])
+def test_non_finite_input_falls_through(table, sleep, stress):
+    assert table.lookup("chb01", _row(sleep, stress)) is None
+
+
+@pytest.mark.parametrize("row", [_row(7.05, 3), _row(7.0, 2.5), _row(13.0, 3), _row(7.0, 3, meds=2)])
+def test_off_grid_input_falls_through(table, row):
+    assert table.lookup("chb01", row) is None
+
+
+@pytest.fixture(scope="module")
+def client():
+    if predictor._bundle is None:
+        assert predictor.load_model(), "foundation model artifacts missing"
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("sleep", ["NaN", "Infinity"])
+def test_predict_scores_non_finite_sleep(client, sleep):
+    # pydantic accepts these JSON tokens as floats; the booster scores them
+    response = client.post(
+        "/ml/predict",
+        content=f'{{"hours_of_sleep": {sleep}, "stress_level": 3, "medication_taken": 1}}',
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 200, response.text
+    assert 0.0 <= response.json()["risk_percentage"] <= 100.0
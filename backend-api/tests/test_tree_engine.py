@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from app.services.eeg_store import load_profiles
+from app.services.feature_assembler import FeatureAssembler
+from app.services.tree_engine import CompiledForest
+from app.utils.model_loader import ML_ENGINE_DIR
+
+# Same bound as the load-time drift check in ModelBundle._compile
+TOLERANCE = 1e-4
+
+
+def _with_edges(X: np.ndarray, forest: CompiledForest, rng: np.random.Generator) -> np.ndarray:
+    """X, a copy with ~20% NaN, and edge rows: all-missing, zeros, values exactly on split thresholds."""
+    missing = X.copy()
+    missing[rng.random(X.shape) < 0.2] = np.nan
+
+    n_features = X.shape[1]
+    edges = [np.full(n_features, np.nan), np.zeros(n_features)]
+    split = forest.left != np.arange(forest.left.size) % forest.max_nodes  # non-leaf nodes
+    on_threshold = np.nanmedian(X, axis=0)
+    for node in np.flatnonzero(split)[:200]:
+        row = on_threshold.copy()
+        row[forest.feature[node]] = forest.threshold[node]
+        edges.append(row)
+    return np.vstack([X, missing, np.asarray(edges)]).astype(np.float32)
+
+
+def _assert_parity(booster: xgb.Booster, X: np.ndarray) -> None:
+    forest = CompiledForest.from_booster(booster)
+    X = _with_edges(X, forest, np.random.default_rng(7))
+    expected = booster.inplace_predict(X)
+    np.testing.assert_allclose(forest.predict(X), expected, atol=TOLERANCE, rtol=0)
+
+
+@pytest.mark.parametrize("objective", ["binary:logistic", "reg:squarederror"])
+def test_synthetic_forest_matches_booster(objective):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 6)).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] > 0).astype(np.float32)
+    # Missing values during training give the trees learned default directions
+    train = X.copy()
+    train[rng.random(X.shape) < 0.15] = np.nan
+    booster = xgb.train(
+        {"objective": objective, "max_depth": 5, "eta": 0.3, "seed": 0},
+        xgb.DMatrix(train, label=y),
+        num_boost_round=40,
+    )
+
+    _assert_parity(booster, rng.normal(scale=2.0, size=(300, 6)))
+
+
+def test_foundation_model_matches_booster():
+    model_path = ML_ENGINE_DIR / "foundation_model_v1.ubj"
+    if not model_path.exists():
+        pytest.skip("foundation model artifact not synced")
+    booster = xgb.Booster(model_file=str(model_path))
+    assembler = FeatureAssembler.from_signature(ML_ENGINE_DIR / "model_signature.json")
+    profiles = list(load_profiles(ML_ENGINE_DIR / "master_eeg_features.csv").as_dict().values())
+
+    rng = np.random.default_rng(1)
+    X = np.vstack([
+        assembler.assemble_batch(
+            [
+                {
+                    "hours_of_sleep": float(rng.uniform(0, 14)),
+                    "stress_level": float(rng.uniform(0, 10)),
+                    "medication_taken": float(rng.integers(0, 2)),
+                    "hours_of_sleep_7day_avg": float(rng.uniform(0, 14)),
+                    "stress_level_7day_avg": float(rng.uniform(0, 10)),
+                    "medication_taken_7day_avg": float(rng.uniform(0, 1)),
+                }
+                for _ in range(20)
+            ],
+            profiles[i],
+        )
+        for i in rng.choice(len(profiles), size=min(len(profiles), 15), replace=False)
+    ])
+
+    _assert_parity(booster, X)